@@ -2,7 +2,7 @@
 #' FILE: molgenis_emx2_client.py
 #' AUTHOR: David Ruvolo
 #' CREATED: 2022-02-09
-#' MODIFIED: 2023-05-11
+#' MODIFIED: 2026-10-18
 #' PURPOSE: EMX2 API py client
 #' STATUS: stable
 #' PACKAGES: requests
@@ -10,9 +10,14 @@
 #'////////////////////////////////////////////////////////////////////////////
 
 from urllib.parse import urlparse, urlunparse
+from concurrent.futures import ThreadPoolExecutor
 from emx2.api.graphql import graphql
 from emx2.api.cli import cli
 import requests
+import random
+import os
+import json
+import time
 import re
 
 print2 = cli()
@@ -25,24 +30,152 @@ def cleanUrl(string:str=None):
   value = value._replace(path = re.sub(r'([\/]{2,})|([\/]{1}$)','', value.path))
   return urlunparse(value)
 
+def batchRecords(records=None, batchSize:int=1000, maxBytes:int=None):
+  """Batch Records
+  Split an iterable of records into lists of at most `batchSize` records. If
+  `maxBytes` is defined, a batch is also closed once the JSON size of its
+  records reaches the limit. Records are consumed lazily, so generators can be
+  used without building the full dataset in memory.
+
+  @param records an iterable (list, generator, etc.) of dictionaries
+  @param batchSize maximum number of records per batch
+  @param maxBytes maximum (approximate) size of a batch in bytes
+
+  @return generator of lists
+  """
+  batch = []
+  batchBytes = 0
+  for record in records:
+    recordBytes = len(json.dumps(record, default=str).encode('utf-8')) if maxBytes else 0
+    if batch and maxBytes and (batchBytes + recordBytes > maxBytes):
+      yield batch
+      batch = []
+      batchBytes = 0
+
+    batch.append(record)
+    batchBytes += recordBytes
+    if batchSize and len(batch) >= batchSize:
+      yield batch
+      batch = []
+      batchBytes = 0
+
+  if batch:
+    yield batch
+
+# status codes that are safe to retry: all requests (idempotent) or requests
+# that were not processed by the server (non-idempotent)
+RETRY_STATUS_CODES = (429, 502, 503, 504)
+RETRY_STATUS_CODES_UNPROCESSED = (429, 503)
+
 class Molgenis:
-  def __init__(self, url:str=None):
+  def __init__(self, url:str=None, timeout=(10, 300), retries:int=3,
+    backoff:float=0.5, maxBackoff:float=30, poolSize:int=10,
+    schemaTtl:int=300, schemaCacheDir:str=None):
+    """EMX2 client
+
+    @param url location of the EMX2 instance
+    @param timeout seconds to wait for a connection and a response; use a
+      tuple (connect, read) or a single value for both
+    @param retries maximum number of times a failed request is retried
+    @param backoff base delay in seconds; the delay doubles after each retry
+    @param maxBackoff maximum delay in seconds between retries
+    @param poolSize maximum number of connections kept open per host
+    @param schemaTtl number of seconds a database schema is cached
+    @param schemaCacheDir if defined, cached schemas are also saved in this
+      directory so that they can be reused by other sessions
+    """
     self.host = cleanUrl(url)
+    self.timeout = timeout
+    self.retries = retries
+    self.backoff = backoff
+    self.maxBackoff = maxBackoff
     self.session = requests.Session()
-    
-  def _post(self,**kwargs):
+    adapter = requests.adapters.HTTPAdapter(
+      pool_connections=poolSize,
+      pool_maxsize=poolSize
+    )
+    self.session.mount('http://', adapter)
+    self.session.mount('https://', adapter)
+    self.stats = {'requests': 0, 'retries': 0, 'waited': 0.0}
+    self.schemaTtl = schemaTtl
+    self.schemaCacheDir = schemaCacheDir
+    self._schemas = {}
+
+  def _errorMessage(self, response):
+    """Error Message
+    Extract error messages from a response. If the body isn't JSON, the text
+    of the response is returned.
+
+    @param response response object
+
+    @return string
+    """
+    try:
+      errors = response.json().get('errors') or []
+      return '\n'.join([err.get('message', '') for err in errors]) or response.text
+    except (ValueError, AttributeError):
+      return response.text or response.reason
+
+  def _wait(self, attempt:int=0, retryAfter:str=None, reason:str=None):
+    """Wait
+    Sleep before the next attempt using exponential backoff with full jitter.
+    If the server sent a `Retry-After` header (in seconds), that value is used
+    as the minimum delay.
+
+    @param attempt the number of the retry (starting at 0)
+    @param retryAfter value of the Retry-After header
+    @param reason a description of the failure to print
+    """
+    delay = random.uniform(0, min(self.maxBackoff, self.backoff * (2 ** attempt)))
+    if retryAfter and str(retryAfter).isdigit():
+      delay = max(delay, min(self.maxBackoff, float(retryAfter)))
+
+    print2.alert_warning(
+      'Request failed', f"({reason})." if reason else '.',
+      'Retrying in', print2.text_value(f"{delay:.2f}s"),
+      f"({attempt + 1}/{self.retries})"
+    )
+    self.stats['retries'] += 1
+    self.stats['waited'] += delay
+    time.sleep(delay)
+
+  def _post(self, idempotent:bool=True, **kwargs):
     """POST Wrapper
-    Send a POST request to an EMX2 instance
+    Send a POST request to an EMX2 instance. Requests that fail because of a
+    connection error, timeout, or a temporary server error (429, 502, 503,
+    504) are retried. Requests that are not idempotent (e.g., insert) are only
+    retried when the server did not process it (connect timeout, 429, 503).
 
+    @param idempotent if True, the request is safe to send more than once
     @param *kwargs other parameters to pass down to session.post    
     @return response object
     """
+    kwargs.setdefault('timeout', self.timeout)
+    statusCodes = RETRY_STATUS_CODES if idempotent else RETRY_STATUS_CODES_UNPROCESSED
+
+    attempt = 0
+    while True:
+      self.stats['requests'] += 1
+      try:
+        response = self.session.post(**kwargs)
+      except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as error:
+        retryable = idempotent or isinstance(error, requests.exceptions.ConnectTimeout)
+        if not retryable or attempt >= self.retries:
+          raise
+        self._wait(attempt, reason=type(error).__name__)
+        attempt += 1
+        continue
+
+      if response.status_code in statusCodes and attempt < self.retries:
+        self._wait(attempt, response.headers.get('Retry-After'), response.status_code)
+        attempt += 1
+        continue
+      break
+
     try:
-      response = self.session.post(**kwargs)
       response.raise_for_status()
-    except requests.exceptions.HTTPError as error:
-      errors = '\n'.join([err['message'] for err in response.json()['errors']])
-      print2.alert_error(print2.text_error('ERROR:\n', errors))
+    except requests.exceptions.HTTPError:
+      print2.alert_error(print2.text_error('ERROR:\n', self._errorMessage(response)))
     return response
 
 
@@ -81,17 +214,30 @@ class Molgenis:
     return response
 
 
-  def add(self, database:str=None, table:str=None, data:list=[]):
+  def add(self, database:str=None, table:str=None, data:list=[],
+    batchSize:int=None, maxBytes:int=None):
     """Add Data
     Import one or more records into a table. Row identifiers are required.
     
     @param database name of the database
     @param table name of the table to import data into
     @param data list of one or more dictionaries
-    
-    @return response
+    @param batchSize if defined, records are sent in batches of this size
+    @param maxBytes if defined, batches are also limited to this size in bytes
+
+    When batchSize or maxBytes is defined, or data is not a list (e.g., a
+    generator), the records are sent using `mutate`.
+
+    @return response or a summary of all batches (see `mutate`)
     """
+    if batchSize or maxBytes or not isinstance(data, list):
+      return self.mutate(
+        database=database, table=table, data=data, operation='insert',
+        batchSize=batchSize or 1000, maxBytes=maxBytes
+      )
+
     response = self._post(
+      idempotent=False,
       url=f"{self.host}/{database}/api/graphql",
       json={
         'query': graphql.insert(table=table),
@@ -109,16 +255,28 @@ class Molgenis:
     return response
 
 
-  def delete(self, database:str=None, table:str=None, data:list=[]):
+  def delete(self, database:str=None, table:str=None, data:list=[],
+    batchSize:int=None, maxBytes:int=None):
     """Delete data
     Delete one or more records from a table. Row identifiers are required
     
     @param database name of the database
     @param table name of the table to remove records from
     @param data a list of dictionaries containing the row identifiers
-    
-    @return response
+    @param batchSize if defined, records are sent in batches of this size
+    @param maxBytes if defined, batches are also limited to this size in bytes
+
+    When batchSize or maxBytes is defined, or data is not a list (e.g., a
+    generator), the records are sent using `mutate`.
+
+    @return response or a summary of all batches (see `mutate`)
     """
+    if batchSize or maxBytes or not isinstance(data, list):
+      return self.mutate(
+        database=database, table=table, data=data, operation='delete',
+        batchSize=batchSize or 1000, maxBytes=maxBytes
+      )
+
     response = self._post(
       url=f"{self.host}/{database}/api/graphql",
       json={
@@ -137,16 +295,28 @@ class Molgenis:
     return response
 
 
-  def update(self, database:str=None, table:str=None, data:list=[]):
+  def update(self, database:str=None, table:str=None, data:list=[],
+    batchSize:int=None, maxBytes:int=None):
     """Update data
     Update one or more records from a table. Row identifiers are required
     
     @param database name of the database
     @param table name of the table
     @param data a list of dictionaries containing the row identifiers
-    
-    @return response
+    @param batchSize if defined, records are sent in batches of this size
+    @param maxBytes if defined, batches are also limited to this size in bytes
+
+    When batchSize or maxBytes is defined, or data is not a list (e.g., a
+    generator), the records are sent using `mutate`.
+
+    @return response or a summary of all batches (see `mutate`)
     """
+    if batchSize or maxBytes or not isinstance(data, list):
+      return self.mutate(
+        database=database, table=table, data=data, operation='update',
+        batchSize=batchSize or 1000, maxBytes=maxBytes
+      )
+
     response = self._post(
       url=f"{self.host}/{database}/api/graphql",
       json={
@@ -165,47 +335,448 @@ class Molgenis:
     return response
   
   
+  def _mutationStatus(self, response, operation:str=None):
+    """Mutation Status
+    Determine the status of a mutation from the response
+
+    @param response response object
+    @param operation name of the mutation (insert, update, save, delete)
+
+    @return tuple containing the status (SUCCESS or FAILED) and message
+    """
+    try:
+      body = response.json()
+    except ValueError:
+      return 'FAILED', response.text
+
+    if body.get('errors'):
+      return 'FAILED', '\n'.join([err.get('message', '') for err in body['errors']])
+
+    result = (body.get('data') or {}).get(operation) or {}
+    status = 'SUCCESS' if response.status_code == 200 else 'FAILED'
+    return result.get('status', status), result.get('message')
+
+
+  def mutate(self, database:str=None, table:str=None, data=None,
+    operation:str='insert', batchSize:int=1000, maxBytes:int=None,
+    stopOnError:bool=False):
+    """Mutate
+    Send records to a table in batches. Records are read lazily from `data`
+    and split by number of records and/or size in bytes. The next batch is
+    prepared while the previous batch is being sent over the session.
+
+    @param database name of the database
+    @param table name of the table
+    @param data an iterable (list, generator, etc.) of dictionaries
+    @param operation insert, update, save, or delete
+    @param batchSize maximum number of records per request
+    @param maxBytes maximum (approximate) size of a request in bytes
+    @param stopOnError if True, no new batches are sent after a failed batch
+
+    @examples
+    ```
+    rows = ({'id': str(num), 'name': f"row {num}"} for num in range(100000))
+    result = db.mutate(database='myDatabase', table='myTable', data=rows)
+    result['failed']
+    ```
+
+    @return dictionary containing the total number of records sent, failed,
+      and the status of each batch
+    """
+    url = f"{self.host}/{database}/api/graphql"
+    query = graphql._operation(operation=operation, table=table)
+    result = {
+      'operation': operation,
+      'table': f"{database}::{table}",
+      'records': 0,
+      'failed': 0,
+      'batches': []
+    }
+
+    def collect(index, size, future):
+      try:
+        response = future.result()
+        status, message = self._mutationStatus(response, operation)
+        statusCode = response.status_code
+      except requests.exceptions.RequestException as error:
+        status, message, statusCode = 'FAILED', str(error), None
+      result['records'] += size
+      if status != 'SUCCESS':
+        result['failed'] += size
+      result['batches'].append({
+        'batch': index,
+        'records': size,
+        'statusCode': statusCode,
+        'status': status,
+        'message': message
+      })
+      return status == 'SUCCESS'
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+      pending = None
+      for index, batch in enumerate(batchRecords(data, batchSize, maxBytes)):
+        if pending and not collect(*pending) and stopOnError:
+          pending = None
+          break
+        future = executor.submit(
+          self._post,
+          idempotent=operation != 'insert',
+          url=url,
+          json={'query': query, 'variables': {'records': batch}}
+        )
+        pending = (index, len(batch), future)
+
+      if pending:
+        collect(*pending)
+
+    batchCount = len(result['batches'])
+    msg = [
+      print2.text_value(result['records'] - result['failed']), 'of',
+      print2.text_value(result['records']),
+      f"record{'s'[:result['records']^1]} in",
+      print2.text_value(batchCount), f"batch{'es'[:(batchCount^1)*2]} for",
+      print2.text_value(result['table'])
+    ]
+
+    if result['failed']:
+      print2.alert_warning(f"Completed {operation} of", *msg)
+    else:
+      print2.alert_success(f"Completed {operation} of", *msg)
+
+    return result
+
+
   def query(self, database:str=None, query:str=None, variables: dict={}):
     """Query
     Run a graphql query
     
-    @param database name of the database to query
+    @param database name of the database to query. If None, the query is sent
+      to the central api (e.g., to create or delete schemas)
     @param query graphql query to run
     
     @return json or error message
     """
+    url = f"{self.host}/{database}/api/graphql" if database else f"{self.host}/api/graphql"
     response = self._post(
-      url=f"{self.host}/{database}/api/graphql",
+      idempotent=not query.lstrip().startswith('mutation'),
+      url=url,
       json={'query': query, 'variables': variables}
     )
 
+    if query.lstrip().startswith('mutation'):
+      self.invalidateSchema(database)
+
     if response.status_code == 200:
       print2.alert_success('Successfully executed query')
 
     return response
+
+  def queryBatch(self, database:str=None, batch=None):
+    """Query Batch
+    Run all queries or mutations of a batch in one request
+
+    @param database name of the database to query. If None, the batch is sent
+      to the central api
+    @param batch a GraphqlBatch object (see `graphql.GraphqlBatch`)
+
+    @return a dictionary containing the status, message, and data of each
+      operation by alias
+
+    @examples
+    ```
+    batch = GraphqlBatch()
+    batch.mutation(operation='save', table='Contacts', records=[...])
+    batch.change(members=[{'email': 'anonymous', 'role': 'Viewer'}])
+    results = db.queryBatch(database='mydatabase', batch=batch)
+    ```
+    """
+    response = self.query(
+      database=database,
+      query=batch.document(),
+      variables=batch.variables()
+    )
+    try:
+      body = response.json()
+    except ValueError:
+      body = {'errors': [{'message': self._errorMessage(response)}]}
+    if response.status_code != 200 and not body.get('errors'):
+      body['errors'] = [{'message': self._errorMessage(response)}]
+    return batch.split(body)
   
   
-  def getSchema(self, database: str=None, table: str=None):
-    """Get Schema
-    Retrieve the schema of a database
-    
+  def _schemaCachePath(self, database:str=None):
+    """Schema Cache Path
+    Location of the cached schema of a database on disk
+    """
+    host = re.sub(r'[^A-Za-z0-9._-]+', '_', urlparse(self.host).netloc)
+    name = re.sub(r'[^A-Za-z0-9._-]+', '_', database)
+    return os.path.join(self.schemaCacheDir, f"{host}_{name}.json")
+
+  def _cacheSchema(self, database:str=None, data:dict=None, cachedAt:float=None):
+    """Cache Schema
+    Store the schema of a database with tables and columns indexed by name
+
     @param database the name of a database
-    @param table if defined, response will be filtered for a specific table
-    
-    @return json
+    @param data the `data` object of the schema query
+    @param cachedAt the time the schema was retrieved
+
+    @return cache entry
+    """
+    tables = {}
+    columns = {}
+    for schematable in data['_schema']['tables']:
+      tables[schematable['name']] = schematable
+      columns[schematable['name']] = {
+        column['name']: column for column in schematable.get('columns') or []
+      }
+
+    entry = {
+      'time': cachedAt or time.time(),
+      'schema': data,
+      'tables': tables,
+      'columns': columns,
+      'selections': {}
+    }
+    self._schemas[database] = entry
+    return entry
+
+  def _loadSchema(self, database:str=None, refresh:bool=False):
+    """Load Schema
+    Get the schema of a database from the cache (memory, then disk). If the
+    schema isn't cached or has expired, the schema is retrieved from the
+    server.
+
+    @param database the name of a database
+    @param refresh if True, the cache is ignored
+
+    @return cache entry or None if the schema could not be retrieved
     """
+    now = time.time()
+    entry = self._schemas.get(database)
+    if entry and not refresh and (now - entry['time'] < self.schemaTtl):
+      return entry
+
+    if self.schemaCacheDir and not refresh:
+      path = self._schemaCachePath(database)
+      if os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as file:
+          cached = json.load(file)
+        if now - cached['time'] < self.schemaTtl:
+          return self._cacheSchema(database, cached['schema'], cached['time'])
+
     response = self._post(
       url=f"{self.host}/{database}/api/graphql",
       json={'query': graphql.schema()}
     )
+
+    data = response.json().get('data')
+    if not data:
+      return None
+
+    entry = self._cacheSchema(database, data)
+    if self.schemaCacheDir:
+      os.makedirs(self.schemaCacheDir, exist_ok=True)
+      with open(self._schemaCachePath(database), 'w', encoding='utf-8') as file:
+        json.dump({'time': entry['time'], 'schema': data}, file)
+    return entry
+
+  def invalidateSchema(self, database:str=None):
+    """Invalidate Schema
+    Remove a database (or all databases) from the schema cache. This is done
+    automatically when a mutation is sent using `query`.
+
+    @param database the name of a database; if None, all schemas are removed
+    """
+    databases = [database] if database else list(self._schemas.keys())
+    for name in databases:
+      self._schemas.pop(name, None)
+      if self.schemaCacheDir:
+        path = self._schemaCachePath(name)
+        if os.path.exists(path):
+          os.remove(path)
+
+  def getSchema(self, database: str=None, table: str=None, refresh: bool=False):
+    """Get Schema
+    Retrieve the schema of a database. Schemas are cached for `schemaTtl`
+    seconds (see Molgenis).
+    
+    @param database the name of a database
+    @param table if defined, response will be filtered for a specific table
+    @param refresh if True, the schema is retrieved from the server
     
-    data = response.json()['data']
+    @return json
+    """
+    entry = self._loadSchema(database, refresh=refresh)
+    if not entry:
+      return None
 
-    if (table is not None) and bool(data):
-      return [schematable for schematable in data['_schema']['tables'] if schematable['name'] == table][0]
+    if table is not None:
+      return entry['tables'][table]
     else:
-      return data
-      
+      return entry['schema']
+
+  def getColumns(self, database: str=None, table: str=None):
+    """Get Columns
+    Retrieve the columns of a table indexed by name
+
+    @param database the name of a database
+    @param table the name of a table
+
+    @return dictionary
+    """
+    entry = self._loadSchema(database)
+    return entry['columns'][table] if entry else None
+
+
+  def _selectFields(self, database:str=None, table:str=None, columns:list=None):
+    """Select Fields
+    Create the selection of the columns in a table using the cached schema.
+    Reference and ontology columns select the key columns of the referenced
+    table; file columns select the file identifier and url. Selections are
+    cached with the schema.
+
+    @param database the name of a database
+    @param table the name of a table
+    @param columns names (or identifiers) of the columns to select; if None,
+      all columns are selected. Fields that aren't a column of the table are
+      used as is (e.g., `"category { name }"`).
+
+    @return tuple containing the graphql identifier of the table and a list
+      of fields
+    """
+    entry = self._loadSchema(database)
+    if entry is None:
+      if columns:
+        return table, list(columns)
+      raise ValueError(f"The schema of {database} could not be retrieved")
+    if table not in entry['tables']:
+      raise ValueError(f"Table {table} not found in {database}")
+
+    key = (table, tuple(columns) if columns else None)
+    if key in entry['selections']:
+      return entry['selections'][key]
+
+    schematable = entry['tables'][table]
+    fields = []
+    selection = {}
+    for column in schematable.get('columns') or []:
+      columnType = column.get('columnType') or ''
+      if columnType in ('HEADING', 'SECTION') or column['name'].startswith('mg_'):
+        continue
+
+      if columnType.startswith(('REF', 'ONTOLOGY')):
+        refColumns = entry['tables'].get(column.get('refTable'), {}).get('columns') or []
+        keys = [
+          refColumn['id'] for refColumn in refColumns
+          if refColumn.get('key') == 1
+          and not (refColumn.get('columnType') or '').startswith(('REF', 'ONTOLOGY'))
+        ]
+        field = f"{column['id']} {{ {' '.join(keys or ['name'])} }}"
+      elif columnType.startswith('FILE'):
+        field = f"{column['id']} {{ id url }}"
+      else:
+        field = column['id']
+      fields.append(field)
+      selection[column['name']] = field
+      selection.setdefault(column['id'], field)
+
+    if columns:
+      fields = [selection.get(column, column) for column in columns]
+
+    entry['selections'][key] = (schematable.get('id') or table, fields)
+    return entry['selections'][key]
+
+  def _defaultOrder(self, database:str=None, table:str=None):
+    """Default Order
+    Order rows by the primary key columns of a table, so that pages are
+    stable. Reference columns are not used.
+
+    @param database the name of a database
+    @param table the name of a table
+
+    @return a graphql orderby object or None if the key is unknown
+    """
+    entry = self._loadSchema(database)
+    schematable = (entry or {}).get('tables', {}).get(table) or {}
+    orderby = {
+      column['id']: 'ASC' for column in schematable.get('columns') or []
+      if column.get('key') == 1
+      and not (column.get('columnType') or '').startswith(('REF', 'ONTOLOGY'))
+    }
+    return orderby or None
+
+  def queryRows(self, database:str=None, table:str=None, columns:list=None,
+    pageSize:int=1000, filter:dict=None, orderby:dict=None, prefetch:bool=True):
+    """Query Rows
+    Retrieve all rows of a table page by page. Rows are yielded one at a time,
+    so only one page (or two when prefetching) is kept in memory.
+
+    @param database the name of a database
+    @param table the name of a table
+    @param columns a list of columns to select; if None, all columns are
+      selected. Reference and file columns are expanded using the schema of
+      the database (see `_selectFields`).
+    @param pageSize number of rows to retrieve per request
+    @param filter a graphql filter object, e.g., `{'name': {'equals': 'x'}}`
+    @param orderby a graphql orderby object, e.g., `{'name': 'ASC'}`. By
+      default, rows are ordered by the key columns of the table
+    @param prefetch if True, the next page is retrieved in the background
+      while the current page is processed
+
+    @examples
+    ```
+    for row in db.queryRows(database='myDatabase', table='myTable'):
+      ...
+    ```
+
+    @return generator of dictionaries
+    """
+    tableId, fields = self._selectFields(database, table, columns)
+    if orderby is None:
+      orderby = self._defaultOrder(database, table)
+
+    url = f"{self.host}/{database}/api/graphql"
+    query = graphql.select(
+      table=tableId,
+      fields=fields,
+      filter=filter is not None,
+      orderby=orderby is not None
+    )
+
+    def getPage(offset):
+      variables = {'limit': pageSize, 'offset': offset}
+      if filter is not None:
+        variables['filter'] = filter
+      if orderby is not None:
+        variables['orderby'] = orderby
+
+      response = self._post(url=url, json={'query': query, 'variables': variables})
+      body = response.json() if response.status_code == 200 else {}
+      if response.status_code != 200 or body.get('errors'):
+        raise requests.exceptions.HTTPError(self._errorMessage(response), response=response)
+      return (body.get('data') or {}).get(tableId) or []
+
+    executor = ThreadPoolExecutor(max_workers=1) if prefetch else None
+    try:
+      offset = 0
+      rows = getPage(offset)
+      while rows:
+        nextPage = None
+        if len(rows) == pageSize and executor:
+          nextPage = executor.submit(getPage, offset + pageSize)
+
+        for row in rows:
+          yield row
+
+        if len(rows) < pageSize:
+          break
+
+        offset += pageSize
+        rows = nextPage.result() if nextPage else getPage(offset)
+    finally:
+      if executor:
+        executor.shutdown(wait=False, cancel_futures=True)
+
 
   def importCsvFile(self, database:str=None, table:str=None, file:str=None):
     """Import CSV File
@@ -239,6 +810,7 @@ class Molgenis:
     )
     
     if response.status_code == 200:
+      self.invalidateSchema(database)
       print2.alert_success(
         'Imported data into',
         print2.text_value(f"{database}::{table}")
@@ -247,6 +819,34 @@ class Molgenis:
     return response
 
     
+  def importZipFile(self, database:str=None, file:str=None):
+    """Import Zip File
+    Import a zip archive (molgenis.csv and data files) into a database. The
+    cached schema of the database is invalidated.
+    
+    @param database name of the database you wish to import data into
+    @param file path to the zip archive
+    
+    @return status message
+    """
+    with open(file, 'rb') as stream:
+      databinary = stream.read()
+
+    response = self._post(
+      url=f"{self.host}/{database}/api/zip",
+      files={'file': (os.path.basename(file), databinary, 'application/zip')}
+    )
+
+    if response.status_code == 200:
+      self.invalidateSchema(database)
+      print2.alert_success(
+        'Imported', print2.text_value(file), 'into',
+        print2.text_value(database)
+      )
+
+    return response
+
+    
   def importData(self, database:str=None, table:str=None, data:str=None):
     """Import Data
     Import a data object into a schema table
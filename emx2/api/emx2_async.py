@@ -0,0 +1,126 @@
+#'////////////////////////////////////////////////////////////////////////////
+#' FILE: emx2_async.py
+#' AUTHOR: David Ruvolo
+#' CREATED: 2026-10-18
+#' MODIFIED: 2026-10-18
+#' PURPOSE: asyncio EMX2 API py client
+#' STATUS: stable
+#' PACKAGES: requests
+#' COMMENTS: requests are sent by the synchronous client in a thread pool so
+#' that all coroutines share the same session (cookies and connection pool)
+#'////////////////////////////////////////////////////////////////////////////
+
+from concurrent.futures import ThreadPoolExecutor
+from emx2.api.emx2 import Molgenis
+import asyncio
+
+class AsyncMolgenis:
+  def __init__(self, url:str=None, maxConcurrency:int=8, **kwargs):
+    """Async EMX2 client
+    Run requests to an EMX2 instance concurrently. At most `maxConcurrency`
+    requests are in flight at the same time; other requests wait until a
+    slot is available.
+
+    @param url location of the EMX2 instance
+    @param maxConcurrency maximum number of requests at the same time
+    @param **kwargs other parameters to pass down to Molgenis (e.g., timeout,
+      retries). The connection pool is at least `maxConcurrency` connections.
+
+    @examples
+    ```
+    import asyncio
+    from emx2.api.emx2_async import AsyncMolgenis
+
+    async def main():
+      async with AsyncMolgenis(url='https://my-emx2-server.com') as db:
+        await db.signin(username='myusername', password='mypassword')
+        return await asyncio.gather(*[
+          db.getSchema(database=name) for name in ['schema1', 'schema2']
+        ])
+
+    schemas = asyncio.run(main())
+    ```
+    """
+    kwargs['poolSize'] = max(maxConcurrency, kwargs.get('poolSize', 10))
+    self.client = Molgenis(url=url, **kwargs)
+    self.host = self.client.host
+    self.maxConcurrency = maxConcurrency
+    self._executor = ThreadPoolExecutor(max_workers=maxConcurrency)
+    self._semaphore = asyncio.Semaphore(maxConcurrency)
+
+  async def __aenter__(self):
+    return self
+
+  async def __aexit__(self, *args):
+    await self.close()
+
+  async def close(self):
+    """Close
+    Shutdown the thread pool and close all connections. Running requests are
+    awaited without blocking the event loop.
+    """
+    loop = asyncio.get_running_loop()
+    await loop.run_in_executor(None, self._executor.shutdown)
+    self.client.session.close()
+
+  @property
+  def stats(self):
+    """Number of requests, retries, and time waited (see Molgenis.stats)"""
+    return self.client.stats
+
+  async def _run(self, method, **kwargs):
+    """Run
+    Run a method of the synchronous client once a slot is available
+
+    @param method a method of `self.client`
+    @param **kwargs parameters to pass down to the method
+
+    @return the result of the method
+    """
+    async with self._semaphore:
+      loop = asyncio.get_running_loop()
+      return await loop.run_in_executor(self._executor, lambda: method(**kwargs))
+
+  async def signin(self, username:str=None, password:str=None):
+    """Signin (see Molgenis.signin)"""
+    return await self._run(self.client.signin, username=username, password=password)
+
+  async def add(self, database:str=None, table:str=None, data:list=[], **kwargs):
+    """Add Data (see Molgenis.add)"""
+    return await self._run(self.client.add, database=database, table=table, data=data, **kwargs)
+
+  async def update(self, database:str=None, table:str=None, data:list=[], **kwargs):
+    """Update data (see Molgenis.update)"""
+    return await self._run(self.client.update, database=database, table=table, data=data, **kwargs)
+
+  async def delete(self, database:str=None, table:str=None, data:list=[], **kwargs):
+    """Delete data (see Molgenis.delete)"""
+    return await self._run(self.client.delete, database=database, table=table, data=data, **kwargs)
+
+  async def mutate(self, database:str=None, table:str=None, data=None, **kwargs):
+    """Mutate (see Molgenis.mutate)"""
+    return await self._run(self.client.mutate, database=database, table=table, data=data, **kwargs)
+
+  async def query(self, database:str=None, query:str=None, variables:dict={}):
+    """Query (see Molgenis.query)"""
+    return await self._run(self.client.query, database=database, query=query, variables=variables)
+
+  async def queryBatch(self, database:str=None, batch=None):
+    """Query Batch (see Molgenis.queryBatch)"""
+    return await self._run(self.client.queryBatch, database=database, batch=batch)
+
+  async def getSchema(self, database:str=None, table:str=None, refresh:bool=False):
+    """Get Schema (see Molgenis.getSchema)"""
+    return await self._run(self.client.getSchema, database=database, table=table, refresh=refresh)
+
+  async def importCsvFile(self, database:str=None, table:str=None, file:str=None):
+    """Import CSV File (see Molgenis.importCsvFile)"""
+    return await self._run(self.client.importCsvFile, database=database, table=table, file=file)
+
+  async def importZipFile(self, database:str=None, file:str=None):
+    """Import Zip File (see Molgenis.importZipFile)"""
+    return await self._run(self.client.importZipFile, database=database, file=file)
+
+  async def importData(self, database:str=None, table:str=None, data:str=None):
+    """Import Data (see Molgenis.importData)"""
+    return await self._run(self.client.importData, database=database, table=table, data=data)
@@ -2,14 +2,18 @@
 # FILE: graphql.py
 # AUTHOR: David Ruvolo
 # CREATED: 2023-05-10
-# MODIFIED: 2023-05-12
+# MODIFIED: 2026-10-18
 # PURPOSE: commonly used graphql queries
 # STATUS: stable
 # PACKAGES: NA
-# COMMENTS: Import file as 'import path.to.graphql.file as graphql'
+# COMMENTS: Import file as 'import path.to.graphql.file as graphql'. Generated
+# table queries are cached by operation, table, and fields (see `graphql.templates`)
 #///////////////////////////////////////////////////////////////////////////////
 
 from enum import Enum
+import re
+
+GRAPHQL_NAME = re.compile(r'^[_A-Za-z][_0-9A-Za-z]*$')
 
 class Operations(Enum):
   """EMX2 Graphql operations"""
@@ -18,6 +22,25 @@ class Operations(Enum):
   save = "save"
   delete = "delete"
 
+OPERATIONS = frozenset(operation.value for operation in Operations)
+
+# generated queries by (operation, table, fields, ...)
+_TEMPLATES = {}
+
+def _template(key:tuple=None, build=None):
+  """Template
+  Get a generated query from the cache or build it once
+
+  @param key identifier of the query, e.g., `('insert', 'Pet')`
+  @param build function that creates the query
+
+  @return string; graphql string
+  """
+  template = _TEMPLATES.get(key)
+  if template is None:
+    template = _TEMPLATES.setdefault(key, build())
+  return template
+
 class graphql:
   
   @staticmethod
@@ -93,6 +116,96 @@ class graphql:
     }
     """
 
+  @staticmethod
+  def schemas():
+    """schemas
+    Query to list all schemas (use the central api: `<host>/api/graphql`)
+    """
+    return """{
+      _schemas {
+        name
+        description
+      }
+    }
+    """
+
+  @staticmethod
+  def createSchema():
+    """createSchema
+    Mutation to create a schema (central api). Variables: name, description,
+    and template (optional).
+    """
+    return """
+      mutation($name:String, $description:String, $template:String) {
+        createSchema(name:$name, description:$description, template:$template) {
+          status
+          message
+        }
+      }
+    """
+
+  @staticmethod
+  def updateSchema():
+    """updateSchema
+    Mutation to update the description of a schema (central api). Variables:
+    name and description.
+    """
+    return """
+      mutation($name:String, $description:String) {
+        updateSchema(name:$name, description:$description) {
+          status
+          message
+        }
+      }
+    """
+
+  @staticmethod
+  def deleteSchema():
+    """deleteSchema
+    Mutation to delete a schema (central api). Variables: id.
+    """
+    return """
+      mutation($id:String) {
+        deleteSchema(id:$id) {
+          status
+          message
+        }
+      }
+    """
+
+  @staticmethod
+  def settings():
+    """settings
+    Query to retrieve the settings and members of a schema
+    """
+    return """{
+      _settings {
+        key
+        value
+      }
+      _members {
+        email
+        role
+      }
+    }
+    """
+
+  @staticmethod
+  def change():
+    """change
+    Mutation to change the settings and members of a schema in one request.
+    Variables: settings (list of `{key, value}`) and members (list of
+    `{email, role}`).
+    """
+    return """
+      mutation($settings:[MolgenisSettingsInput], $members:[MolgenisMembersInput]) {
+        change(settings:$settings, members:$members) {
+          status
+          message
+        }
+      }
+    """
+
   def _operation(operation:str=None, table:str=None):
     """Operation
     Wrapper around operations (update, delete, save, insert)
@@ -102,17 +215,17 @@ class graphql:
     
     @return string; graphql string
     """
-    if not hasattr(Operations, operation):
+    if operation not in OPERATIONS:
       raise ValueError('Invalid operation used in query')
 
-    return (
+    return _template((operation, table), lambda: (
       "mutation " + operation + "($records:["+ table + "Input]) {\n"
       "  " + operation + "(" + table + ":$records) {\n"
       "    status\n"
       "    message\n"
       "  }\n"
       "}"
-    )
+    ))
 
   def delete(table:str=None):
     """Delete    
@@ -169,3 +282,272 @@ class graphql:
     ```
     """
     return graphql._operation(operation='update', table=table)
+
+  def select(table:str=None, fields:list=None, filter:bool=False, orderby:bool=False):
+    """select
+    Query to retrieve a page of rows from a table
+    
+    @param table identifier of the table
+    @param fields a list of columns to select; nested columns should include
+      the selection, e.g., `"category { name }"`
+    @param filter if True, the query accepts the variable `filter`
+    @param orderby if True, the query accepts the variable `orderby`
+    
+    @examples
+    When sending the query, define the variables like so.
+    
+    ```
+    emx2.query(
+      database='mydatabase',
+      query=graphql.select(table='mytable', fields=['id', 'name']),
+      variables={'limit': 100, 'offset': 0}
+    )
+    ```
+    """
+    fields = tuple(fields)
+
+    def build():
+      variables = ["$limit:Int", "$offset:Int"]
+      arguments = ["limit:$limit", "offset:$offset"]
+      if filter:
+        variables.append("$filter:" + table + "Filter")
+        arguments.append("filter:$filter")
+      if orderby:
+        variables.append("$orderby:" + table + "orderby")
+        arguments.append("orderby:$orderby")
+
+      return (
+        "query select(" + ", ".join(variables) + ") {\n"
+        "  " + table + "(" + ", ".join(arguments) + ") {\n"
+        + "".join(["    " + field + "\n" for field in fields]) +
+        "  }\n"
+        "}"
+      )
+
+    return _template(('select', table, fields, bool(filter), bool(orderby)), build)
+
+  def templates():
+    """Templates
+    Queries generated so far (insert, update, save, delete, and select)
+
+    @return dictionary of queries by (operation, table[, fields, filter, orderby])
+    """
+    return dict(_TEMPLATES)
+
+class GraphqlBatch:
+  def __init__(self):
+    """GraphQL Batch
+    Combine several queries or mutations into one GraphQL document so that
+    they are sent in one request. Each operation is aliased and its variables
+    are prefixed with the alias (e.g., `$saveContacts_records`). Queries and
+    mutations cannot be combined in the same batch.
+
+    @examples
+    ```
+    batch = GraphqlBatch()
+    batch.mutation(operation='save', table='Organisations', records=[...])
+    batch.mutation(operation='save', table='Contacts', records=[...])
+    batch.change(members=[{'email': 'anonymous', 'role': 'Viewer'}])
+
+    results = emx2.queryBatch(database='mydatabase', batch=batch)
+    results['saveContacts']['status']
+    ```
+    """
+    self.operationType = None
+    self._fields = []
+    self._variables = {}
+
+  def __len__(self):
+    return len(self._fields)
+
+  @property
+  def aliases(self):
+    """Aliases of all operations in the order they were added"""
+    return [alias for alias, _ in self._fields]
+
+  def _alias(self, alias:str=None, field:str=None):
+    """Alias
+    Validate an alias or create one from the name of the field
+
+    @param alias requested alias
+    @param field name of the field (used if alias isn't defined)
+
+    @return string
+    """
+    aliases = self.aliases
+    if alias is None:
+      alias = field
+      if alias in aliases:
+        alias = f"{field}_{len(aliases)}"
+
+    if not GRAPHQL_NAME.match(alias):
+      raise ValueError(f"Invalid alias '{alias}'")
+    if alias in aliases:
+      raise ValueError(f"Alias '{alias}' is already used in this batch")
+    return alias
+
+  def add(self, field:str=None, arguments:dict=None, selection:str='status message',
+          alias:str=None, operationType:str='mutation'):
+    """Add
+    Add an operation to the batch
+
+    @param field name of the query or mutation (e.g., `save`, `change`)
+    @param arguments a dictionary of argument names and a tuple containing the
+      graphql type and the value, e.g., `{'name': ('String', 'myschema')}`
+    @param selection fields to return
+    @param alias name of the result (default: the name of the field)
+    @param operationType `mutation` or `query`
+
+    @return the alias of the operation
+    """
+    if operationType not in ('mutation', 'query'):
+      raise ValueError(f"Invalid operation type '{operationType}'")
+    if self.operationType and operationType != self.operationType:
+      raise ValueError('Queries and mutations cannot be combined in one batch')
+
+    alias = self._alias(alias=alias, field=field)
+    args = []
+    for name, (graphqlType, value) in (arguments or {}).items():
+      variable = f"{alias}_{name}"
+      self._variables[variable] = (graphqlType, value)
+      args.append(f"{name}:${variable}")
+
+    text = alias + ": " + field
+    if args:
+      text += "(" + ", ".join(args) + ")"
+    if selection:
+      text += " { " + selection + " }"
+
+    self._fields.append((alias, text))
+    self.operationType = operationType
+    return alias
+
+  def mutation(self, operation:str=None, table:str=None, records:list=None, alias:str=None):
+    """Mutation
+    Add an insert, update, save, or delete mutation of a table
+
+    @param operation choose insert, update, save, or delete
+    @param table name of the table
+    @param records list of records
+    @param alias name of the result (default: operation and table, e.g.,
+      `saveContacts`)
+
+    @return the alias of the operation
+    """
+    if operation not in OPERATIONS:
+      raise ValueError('Invalid operation used in query')
+
+    if alias is None and GRAPHQL_NAME.match(operation + table):
+      alias = operation + table
+      if alias in self.aliases:
+        alias = f"{alias}_{len(self)}"
+
+    return self.add(
+      field=operation,
+      arguments={table: (f"[{table}Input]", records)},
+      alias=alias
+    )
+
+  def change(self, settings:list=None, members:list=None, alias:str=None):
+    """Change
+    Add a mutation that changes the settings and/or members of a schema
+
+    @param settings list of `{key, value}`
+    @param members list of `{email, role}`
+    @param alias name of the result
+
+    @return the alias of the operation
+    """
+    arguments = {}
+    if settings is not None:
+      arguments['settings'] = ('[MolgenisSettingsInput]', settings)
+    if members is not None:
+      arguments['members'] = ('[MolgenisMembersInput]', members)
+    return self.add(field='change', arguments=arguments, alias=alias)
+
+  def select(self, table:str=None, fields:list=None, alias:str=None,
+             limit:int=None, offset:int=None, filter:dict=None):
+    """Select
+    Add a query that retrieves rows from a table
+
+    @param table identifier of the table
+    @param fields a list of columns to select (see `graphql.select`)
+    @param alias name of the result
+    @param limit maximum number of rows
+    @param offset number of rows to skip
+    @param filter a filter object
+
+    @return the alias of the operation
+    """
+    arguments = {}
+    if limit is not None:
+      arguments['limit'] = ('Int', limit)
+    if offset is not None:
+      arguments['offset'] = ('Int', offset)
+    if filter is not None:
+      arguments['filter'] = (table + 'Filter', filter)
+
+    return self.add(
+      field=table,
+      arguments=arguments,
+      selection=" ".join(fields),
+      alias=alias,
+      operationType='query'
+    )
+
+  def document(self):
+    """Document
+    Build the graphql document of all operations
+
+    @return string; graphql string
+    """
+    if not self._fields:
+      raise ValueError('The batch does not contain any operations')
+
+    variables = ", ".join([
+      f"${name}:{graphqlType}" for name, (graphqlType, _) in self._variables.items()
+    ])
+    return (
+      self.operationType + " batch" + (f"({variables})" if variables else "") + " {\n"
+      + "".join(["  " + text + "\n" for _, text in self._fields]) +
+      "}"
+    )
+
+  def variables(self):
+    """Variables
+    Values of all (prefixed) variables
+
+    @return dict
+    """
+    return {name: value for name, (_, value) in self._variables.items()}
+
+  def split(self, body:dict=None):
+    """Split
+    Split the response of a batch by alias. Errors are assigned to an
+    operation using the path of the error; errors without a path (e.g., an
+    invalid document) are assigned to all operations.
+
+    @param body json body of the response
+
+    @return a dictionary containing the status (SUCCESS or FAILED), message,
+      and data of each alias
+    """
+    data = (body or {}).get('data') or {}
+    errors = {alias: [] for alias in self.aliases}
+    for error in (body or {}).get('errors') or []:
+      path = error.get('path') or []
+      targets = [path[0]] if path and path[0] in errors else self.aliases
+      for alias in targets:
+        errors[alias].append(error.get('message', ''))
+
+    results = {}
+    for alias in self.aliases:
+      result = data.get(alias)
+      if errors[alias]:
+        status, message = 'FAILED', '\n'.join(errors[alias])
+      elif isinstance(result, dict) and 'status' in result:
+        status, message = result['status'], result.get('message')
+      else:
+        status, message = 'SUCCESS', None
+      results[alias] = {'status': status, 'message': message, 'data': result}
+    return results
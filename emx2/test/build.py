@@ -2,7 +2,7 @@
 # FILE: build.py
 # AUTHOR: David Ruvolo
 # CREATED: 2023-05-19
-# MODIFIED: 2023-05-19
+# MODIFIED: 2026-10-18
 # PURPOSE: build example dataset
 # STATUS: in.progress
 # PACKAGES: **see below**
@@ -10,11 +10,12 @@
 # ///////////////////////////////////////////////////////////////////////////////
 
 from os import path
+from math import ceil
 from random import getrandbits
 import csv
 from datatable import dt, f, as_type
 from tqdm import tqdm
-from erns.utils.ror import RorClient
+from erns.utils.ror import RorClient, normalise_ror_id
 
 
 def to_csv(data, file):
@@ -29,10 +30,11 @@ def calculate_age(recent, earliest):
 # ///////////////////////////////////////////////////////////////////////////////
 
 
-ror = RorClient()
+# responses are cached so that the dataset can be rebuilt offline, e.g.,
+# RorClient(cache_path='emx2/test/ror_cache.sqlite', offline=True)
+ror = RorClient(cache_path='emx2/test/ror_cache.sqlite')
 
 # query for institutions
-API_URL = 'https://api.ror.org/organizations'
 QUERY_COUNTRY = '+OR+'.join([
     "country.country_code:NL",
     "country.country_code:BE",
@@ -46,19 +48,17 @@ QUERY_TYPE = '+OR+'.join([
     'types:Nonprofit',
 ])
 
-url = f"{API_URL}?query.advanced=({QUERY_COUNTRY})+AND+({QUERY_TYPE})"
-response = ror.session.get(url)
-pages = response.json().get('number_of_results')
+QUERY = f"({QUERY_COUNTRY})+AND+({QUERY_TYPE})"
+response = ror.search_organizations_advanced(QUERY)
+pages = ceil(response.get('number_of_results') / 20)
 
 
 # get results for each page
 rawdata = []
 for page in tqdm(range(0, pages)):
-    response = ror.session.get(f"{url}&page={page+1}")
-    if response.ok:
-        json = response.json()
-        if json.get('items'):
-            rawdata.extend(json.get('items'))
+    json = ror.search_organizations_advanced(QUERY, page=page+1)
+    if json and json.get('items'):
+        rawdata.extend(json.get('items'))
 
 # extract data of interest
 data = []
@@ -75,14 +75,13 @@ for row in rawdata:
 
 
 # get institution-level information
-for row in tqdm(data):
-    response = ror.session.get(f"{API_URL}/{row['code']}")
-    if response.ok:
-        json = response.json()
-        if json:
-            row['established'] = json['established']
-            row['latitude'] = json['addresses'][0].get('lat')
-            row['longitude'] = json['addresses'][0].get('lng')
+organisations = ror.get_organisations([row['code'] for row in data])
+for row in data:
+    organisation = organisations.get(normalise_ror_id(row['code']))
+    if organisation:
+        row['established'] = organisation['established']
+        row['latitude'] = organisation['latitude']
+        row['longitude'] = organisation['longitude']
 
 
 # ///////////////////////////////////////////////////////////////////////////////
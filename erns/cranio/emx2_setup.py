@@ -0,0 +1,322 @@
+"""Provision EMX2 schemas for ERN CRANIO
+FILE: emx2_setup.py
+AUTHOR: David Ruvolo
+CREATED: 2026-10-18
+MODIFIED: 2026-10-18
+PURPOSE: create and configure the public schema and a schema per organisation
+STATUS: stable
+PACKAGES: **see below**
+COMMENTS: Python version of emx2_setup.sh. Each step is only run if the target
+state is not in place (e.g., the schema exists or the menu is already set), so
+the script can be run as often as needed. Schemas are created in one batched
+request and configured concurrently.
+
+    python erns/cranio/emx2_setup.py --primary-schema cranio-public
+
+To (re)build the archive with resized images before it is imported, add
+`--archive erns/cranio/ern_cranio.zip --build-archive --import-archive`.
+
+Credentials are read from the environment (or a .env file): CRANIO_EMX2_HOST,
+CRANIO_EMX2_USR, and CRANIO_EMX2_PWD.
+"""
+
+from os import environ
+import argparse
+import asyncio
+import random
+import string
+import json
+from dotenv import load_dotenv
+from emx2.api.emx2_async import AsyncMolgenis
+from emx2.api.graphql import graphql, GraphqlBatch
+from erns.cranio.images_prep import prepare_images, build_archive
+from erns.utils.utils import print2
+
+MEMBERS = {'anonymous': 'Viewer'}
+
+
+def random_key(length=7):
+    """Create a random alphanumeric key (used to identify menu items)
+
+    :param length: number of characters
+    :type length: int
+
+    :rtype: str
+    """
+    return ''.join(random.choices(string.ascii_letters + string.digits, k=length))
+
+
+def create_menu(items):
+    """Create the value of the menu setting
+
+    :param items: menu items (label, href, role)
+    :type items: list
+
+    :returns: menu items with a key as a json string
+    :rtype: str
+    """
+    return json.dumps([dict(item, key=random_key()) for item in items])
+
+
+def same_setting(key, current, value):
+    """Check if a setting is already set to a value
+
+    Menu items are compared without the randomly generated keys.
+    """
+    if current is None:
+        return False
+    if key == 'menu':
+        try:
+            return [
+                {name: item.get(name) for name in item if name != 'key'}
+                for item in json.loads(current)
+            ] == [
+                {name: item.get(name) for name in item if name != 'key'}
+                for item in json.loads(value)
+            ]
+        except (TypeError, ValueError):
+            return False
+    return current == value
+
+
+def get_status(response, operation):
+    """Get the status of a graphql operation
+
+    :returns: SUCCESS or the error message
+    :rtype: str
+    """
+    try:
+        body = response.json()
+    except ValueError:
+        return f"FAILED ({response.status_code})"
+    result = (body.get('data') or {}).get(operation) or {}
+    if result.get('status'):
+        return result['status']
+    errors = body.get('errors') or [{}]
+    return f"FAILED ({errors[0].get('message', response.status_code)})"
+
+
+async def get_schemas(db):
+    """Get the name and description of all schemas
+
+    :rtype: dict
+    """
+    response = await db.query(database=None, query=graphql.schemas())
+    schemas = (response.json().get('data') or {}).get('_schemas') or []
+    return {schema['name']: schema.get('description') for schema in schemas}
+
+
+def plan_schemas(batch, targets, schemas, remove=None):
+    """Add the schema mutations that are needed to a batch
+
+    Schemas that do not exist are created and the description of existing
+    schemas is updated if it is different.
+
+    :param batch: batch of mutations (sent to the central api)
+    :type batch: GraphqlBatch
+
+    :param targets: schemas to provision (name, description, and template)
+    :type targets: list
+
+    :param schemas: existing schemas and their description (see `get_schemas`)
+    :type schemas: dict
+
+    :param remove: schemas to remove
+    :type remove: list
+
+    :returns: aliases of the mutations by step and schema
+    :rtype: dict
+    """
+    aliases = {'delete': {}, 'create': {}, 'update': {}}
+    for name in remove or []:
+        if name in schemas:
+            aliases['delete'][name] = batch.add(
+                field='deleteSchema',
+                arguments={'id': ('String', name)},
+                alias=f"delete{len(batch)}"
+            )
+
+    for target in targets:
+        name = target['name']
+        if name not in schemas or name in aliases['delete']:
+            arguments = {
+                'name': ('String', name),
+                'description': ('String', target['description'])
+            }
+            if target.get('template'):
+                arguments['template'] = ('String', target['template'])
+            aliases['create'][name] = batch.add(
+                field='createSchema', arguments=arguments, alias=f"create{len(batch)}")
+        elif schemas[name] != target['description']:
+            aliases['update'][name] = batch.add(
+                field='updateSchema',
+                arguments={
+                    'name': ('String', name),
+                    'description': ('String', target['description'])
+                },
+                alias=f"update{len(batch)}"
+            )
+    return aliases
+
+
+async def configure_schema(db, name, settings, members):
+    """Change the settings and members of a schema that are not set
+
+    :param db: EMX2 client
+    :type db: AsyncMolgenis
+
+    :param name: name of the schema
+    :type name: str
+
+    :param settings: settings by key
+    :type settings: dict
+
+    :param members: role by email
+    :type members: dict
+
+    :returns: status of the change (or 'skipped')
+    :rtype: str
+    """
+    response = await db.query(database=name, query=graphql.settings())
+    state = response.json().get('data') or {}
+    current_settings = {
+        setting['key']: setting['value'] for setting in state.get('_settings') or []
+    }
+    current_members = {
+        member['email']: member['role'] for member in state.get('_members') or []
+    }
+
+    changes = {
+        'settings': [
+            {'key': key, 'value': value} for key, value in settings.items()
+            if not same_setting(key, current_settings.get(key), value)
+        ],
+        'members': [
+            {'email': email, 'role': role} for email, role in members.items()
+            if current_members.get(email) != role
+        ],
+    }
+    if not changes['settings'] and not changes['members']:
+        return 'skipped'
+
+    response = await db.query(database=name, query=graphql.change(), variables=changes)
+    return get_status(response, 'change')
+
+
+async def provision(args):
+    """Provision the public schema and the schema of each organisation
+
+    All schemas are removed, created, and updated in one request. Afterwards,
+    the settings and members of each schema are changed concurrently.
+    """
+    with open(args.menus, 'r', encoding='utf-8') as file:
+        menus = json.load(file)
+    with open(args.organisations, 'r', encoding='utf-8') as file:
+        organisations = json.load(file)
+
+    targets = [{
+        'name': args.primary_schema,
+        'description': args.description,
+        'template': 'ERN_DASHBOARD',
+        'settings': {'menu': create_menu(menus['public'])},
+    }] + [
+        {
+            'name': organisation['schemaName'],
+            'description': organisation['name'],
+            'settings': {
+                'CRANIO_PUBLIC_SCHEMA': args.primary_schema,
+                'menu': create_menu(menus['provider']),
+            },
+        }
+        for organisation in organisations
+    ]
+
+    async with AsyncMolgenis(url=args.host, maxConcurrency=args.max_concurrency) as db:
+        await db.signin(username=args.username, password=args.password)
+        schemas = await get_schemas(db)
+
+        batch = GraphqlBatch()
+        aliases = plan_schemas(batch, targets, schemas, remove=args.remove)
+        results = {}
+        if len(batch):
+            print2('Sending', len(batch), 'schema mutations....')
+            results = await db.queryBatch(database=None, batch=batch)
+
+        for name, alias in aliases['delete'].items():
+            print2('Removed', name, results[alias]['status'])
+
+        steps = {}
+        for target in targets:
+            name = target['name']
+            steps[name] = {'create': 'skipped', 'update': 'skipped', 'change': 'skipped'}
+            for step in ('create', 'update'):
+                if name in aliases[step]:
+                    result = results[aliases[step][name]]
+                    steps[name][step] = result['status'] if result['status'] == 'SUCCESS' \
+                        else f"FAILED ({result['message']})"
+
+        ready = [
+            target for target in targets
+            if not steps[target['name']]['create'].startswith('FAILED')
+        ]
+        print2('Configuring', len(ready), 'schemas....')
+        changes = await asyncio.gather(*[
+            configure_schema(db, target['name'], target['settings'], MEMBERS)
+            for target in ready
+        ])
+        for target, status in zip(ready, changes):
+            steps[target['name']]['change'] = status
+
+        primary = steps[args.primary_schema]
+        if args.archive and (
+            primary['create'] == 'SUCCESS'
+            or (primary['create'] == 'skipped' and args.import_archive)
+        ):
+            response = await db.importZipFile(database=args.primary_schema, file=args.archive)
+            primary['archive'] = 'SUCCESS' if response.status_code == 200 \
+                else f"FAILED ({response.status_code})"
+
+        for target in targets:
+            print2(f"{target['description']} ({target['name']}):", steps[target['name']])
+        print2('Requests:', db.stats)
+
+
+def parse_args():
+    """Parse command line arguments"""
+    load_dotenv()
+    parser = argparse.ArgumentParser(description='Provision EMX2 schemas for ERN CRANIO')
+    parser.add_argument('--host', default=environ.get('CRANIO_EMX2_HOST'))
+    parser.add_argument('--username', default=environ.get('CRANIO_EMX2_USR'))
+    parser.add_argument('--password', default=environ.get('CRANIO_EMX2_PWD'))
+    parser.add_argument('--primary-schema', required=True,
+                        help='name of the public schema')
+    parser.add_argument('--description', default='CRANIO STATS',
+                        help='description of the public schema')
+    parser.add_argument('--organisations', default='erns/cranio/cranio_organisations.json',
+                        help='organisations (name and schemaName)')
+    parser.add_argument('--menus', default='erns/cranio/emx2_menus.json',
+                        help='public and provider menus')
+    parser.add_argument('--archive', default=None,
+                        help='zip archive to import into the public schema when it is created')
+    parser.add_argument('--import-archive', action='store_true',
+                        help='import the archive even if the public schema exists')
+    parser.add_argument('--build-archive', action='store_true',
+                        help='create the archive from the imports (see images_prep.py)')
+    parser.add_argument('--imports', default='erns/cranio/imports',
+                        help='location of the csv files and images used to build the archive')
+    parser.add_argument('--remove', nargs='*', default=[],
+                        help='schemas to remove (e.g., "pet store")')
+    parser.add_argument('--max-concurrency', type=int, default=8,
+                        help='maximum number of requests at the same time')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    arguments = parse_args()
+    if arguments.build_archive and arguments.archive:
+        build_archive(
+            arguments.archive,
+            imports_dir=arguments.imports,
+            thumbnails=prepare_images(source_dir=f"{arguments.imports}/_files")
+        )
+    asyncio.run(provision(arguments))
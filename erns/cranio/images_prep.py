@@ -0,0 +1,247 @@
+"""Prepare organisation images for the dashboard
+FILE: images_prep.py
+AUTHOR: David Ruvolo
+CREATED: 2026-10-18
+MODIFIED: 2026-10-18
+PURPOSE: resize organisation images and build the EMX2 archive
+STATUS: stable
+PACKAGES: pillow
+COMMENTS: Images in `imports/_files` are resized to fit within `max_size`
+pixels and re-encoded in the same format (i.e., JPG or PNG). Thumbnails are
+named after the hash of the source image, so identical images are processed
+once and a changed image never overwrites the thumbnail of another image. The
+image column of `organisations.csv` is updated when the archive is created.
+Results are cached by the hash of the source image and the settings, so only
+new and changed images are processed.
+
+    python erns/cranio/images_prep.py --archive erns/cranio/ern_cranio.zip
+"""
+
+from os import listdir, makedirs, path, remove
+import argparse
+import csv
+import hashlib
+import io
+import json
+import zipfile
+from shutil import copyfile
+from PIL import Image
+from erns.utils.utils import print2
+
+IMAGE_FORMATS = {'.jpg': 'JPEG', '.jpeg': 'JPEG', '.png': 'PNG'}
+
+
+def file_hash(file, chunk_size=1024 * 1024):
+    """Create a hash of the content of a file (read in chunks)
+
+    :rtype: str
+    """
+    checksum = hashlib.sha256()
+    with open(file, 'rb') as stream:
+        for chunk in iter(lambda: stream.read(chunk_size), b''):
+            checksum.update(chunk)
+    return checksum.hexdigest()
+
+
+def make_thumbnail(source, destination, max_size=400, quality=85):
+    """Resize and re-encode an image
+
+    The image is only made smaller (the aspect ratio is kept). JPEGs are saved
+    as progressive JPEGs and PNGs are optimised (palette images keep a
+    palette). If the result is larger than the source, the source is used.
+
+    :param source: location of the image
+    :type source: str
+
+    :param destination: location of the thumbnail
+    :type destination: str
+
+    :param max_size: maximum width and height in pixels
+    :type max_size: int
+
+    :param quality: JPEG quality (1-95)
+    :type quality: int
+    """
+    image_format = IMAGE_FORMATS[path.splitext(destination)[1].lower()]
+    with Image.open(source) as image:
+        image.thumbnail((max_size, max_size), Image.LANCZOS)
+        if image_format == 'JPEG':
+            image.convert('RGB').save(
+                destination, 'JPEG', quality=quality, optimize=True, progressive=True)
+        else:
+            if image.mode == 'P':
+                image = image.convert('RGBA').quantize(
+                    colors=256, method=Image.Quantize.FASTOCTREE)
+            image.save(destination, 'PNG', optimize=True)
+
+    if path.getsize(destination) >= path.getsize(source):
+        copyfile(source, destination)
+
+
+def prepare_images(source_dir='erns/cranio/imports/_files',
+                   output_dir='erns/cranio/data/_files',
+                   max_size=400, quality=85):
+    """Create thumbnails of all images in a directory
+
+    :param source_dir: location of the images
+    :type source_dir: str
+
+    :param output_dir: location of the thumbnails and the cache (`cache.json`)
+    :type output_dir: str
+
+    :param max_size: maximum width and height in pixels
+    :type max_size: int
+
+    :param quality: JPEG quality (1-95)
+    :type quality: int
+
+    :returns: the name of the thumbnail of each image (duplicates refer to the
+      same thumbnail)
+    :rtype: dict
+    """
+    makedirs(output_dir, exist_ok=True)
+    cache_path = path.join(output_dir, 'cache.json')
+    cache = {}
+    if path.exists(cache_path):
+        with open(cache_path, 'r', encoding='utf-8') as file:
+            cache = json.load(file)
+
+    settings = f"{max_size}:{quality}"
+    images = sorted(
+        name for name in listdir(source_dir)
+        if path.splitext(name)[1].lower() in IMAGE_FORMATS
+    )
+
+    thumbnails = {}
+    processed = {}
+    result = {'processed': 0, 'cached': 0, 'duplicates': 0}
+    for name in images:
+        checksum = file_hash(path.join(source_dir, name))
+        if checksum in processed:
+            thumbnails[name] = processed[checksum]
+            result['duplicates'] += 1
+            continue
+
+        key = f"{checksum}:{settings}"
+        entry = cache.get(key)
+        if entry and path.exists(path.join(output_dir, entry['thumbnail'])):
+            result['cached'] += 1
+        else:
+            thumbnail = checksum[:16] + path.splitext(name)[1].lower()
+            make_thumbnail(
+                source=path.join(source_dir, name),
+                destination=path.join(output_dir, thumbnail),
+                max_size=max_size,
+                quality=quality
+            )
+            entry = {
+                'thumbnail': thumbnail,
+                'size': path.getsize(path.join(output_dir, thumbnail))
+            }
+            cache[key] = entry
+            result['processed'] += 1
+
+        processed[checksum] = entry['thumbnail']
+        thumbnails[name] = entry['thumbnail']
+
+    # remove cache entries and thumbnails of images that no longer exist
+    used = set(processed.values())
+    for key, entry in cache.items():
+        thumbnail = path.join(output_dir, entry['thumbnail'])
+        if entry['thumbnail'] not in used and path.exists(thumbnail):
+            remove(thumbnail)
+    keys = {f"{checksum}:{settings}" for checksum in processed}
+    cache = {key: entry for key, entry in cache.items() if key in keys}
+    with open(cache_path, 'w', encoding='utf-8') as file:
+        json.dump(cache, file, indent=2)
+
+    source_size = sum(path.getsize(path.join(source_dir, name)) for name in images)
+    output_size = sum(path.getsize(path.join(output_dir, name)) for name in used)
+    print2(
+        f"Prepared {len(images)} images: {result['processed']} processed,",
+        f"{result['cached']} cached, {result['duplicates']} duplicates",
+        f"({source_size // 1024} KB to {output_size // 1024} KB)"
+    )
+    return thumbnails
+
+
+def build_archive(archive, imports_dir='erns/cranio/imports',
+                  output_dir='erns/cranio/data/_files', thumbnails=None):
+    """Create the EMX2 archive of the public schema using the thumbnails
+
+    All files in `imports_dir` are added to the archive, except for the
+    original images. The image column of `organisations.csv` refers to the
+    thumbnail of each image (duplicates refer to the same thumbnail).
+
+    :param archive: location of the archive (zip)
+    :type archive: str
+
+    :param imports_dir: location of the csv files
+    :type imports_dir: str
+
+    :param output_dir: location of the thumbnails
+    :type output_dir: str
+
+    :param thumbnails: name of the thumbnail of each image (see
+      `prepare_images`)
+    :type thumbnails: dict
+
+    :returns: location of the archive
+    :rtype: str
+    """
+    stems = {
+        path.splitext(name)[0]: path.splitext(thumbnail)[0]
+        for name, thumbnail in (thumbnails or {}).items()
+    }
+
+    with zipfile.ZipFile(archive, 'w', zipfile.ZIP_DEFLATED) as zipped:
+        for name in sorted(listdir(imports_dir)):
+            file = path.join(imports_dir, name)
+            if not path.isfile(file):
+                continue
+            if name == 'organisations.csv' and stems:
+                with open(file, 'r', encoding='utf-8-sig', newline='') as stream:
+                    rows = list(csv.DictReader(stream))
+                content = io.StringIO()
+                writer = csv.DictWriter(content, fieldnames=list(rows[0].keys()))
+                writer.writeheader()
+                for row in rows:
+                    row['image'] = stems.get(row.get('image'), row.get('image'))
+                    writer.writerow(row)
+                zipped.writestr(name, content.getvalue())
+            else:
+                zipped.write(file, name)
+
+        for thumbnail in sorted(set((thumbnails or {}).values())):
+            zipped.write(path.join(output_dir, thumbnail), f"_files/{thumbnail}")
+
+    print2('Created archive', archive)
+    return archive
+
+
+def parse_args():
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description='Prepare images for the CRANIO dashboard')
+    parser.add_argument('--imports', default='erns/cranio/imports',
+                        help='location of the csv files and images (_files)')
+    parser.add_argument('--output', default='erns/cranio/data/_files',
+                        help='location of the thumbnails')
+    parser.add_argument('--archive', default=None,
+                        help='if defined, the EMX2 archive is created')
+    parser.add_argument('--max-size', type=int, default=400,
+                        help='maximum width and height in pixels')
+    parser.add_argument('--quality', type=int, default=85,
+                        help='JPEG quality')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    images = prepare_images(
+        source_dir=path.join(args.imports, '_files'),
+        output_dir=args.output,
+        max_size=args.max_size,
+        quality=args.quality
+    )
+    if args.archive:
+        build_archive(args.archive, args.imports, args.output, images)
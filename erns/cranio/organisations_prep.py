@@ -13,7 +13,7 @@ COMMENTS: NA
 from os import environ
 from datatable import dt, f
 from dotenv import load_dotenv
-from erns.utils.utils import flatten_data
+from erns.utils.utils import flatten_columns
 from erns.utils.molgenis2 import Molgenis
 load_dotenv()
 
@@ -22,7 +22,7 @@ db.login(environ['CRANIO_PROD_USR'], environ['CRANIO_PROD_PWD'])
 
 # get project-organisations data
 projects = db.get("organisations_projects")
-projectsDT = dt.Frame(flatten_data(data=projects, col_patterns="code"))
+projectsDT = dt.Frame(flatten_columns(data=projects, col_patterns="code"))
 
 # get ROR orgs metdata
 organisations = db.get("organisations_organisations")
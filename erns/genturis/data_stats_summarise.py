@@ -2,7 +2,7 @@
 # FILE: data_stats_summarise.py
 # AUTHOR: David Ruvolo
 # CREATED: 2023-02-16
-# MODIFIED: 2023-05-15
+# MODIFIED: 2026-10-18
 # PURPOSE: summarise data for dashboard
 # STATUS: stable
 # PACKAGES: **see below**
@@ -13,112 +13,27 @@
 #   3. calculates descriptives: sex at birth, age at last follow-up
 #///////////////////////////////////////////////////////////////////////////////
 
-import molgenis.client as molgenis
+from erns.genturis.disease_groups import DiseaseGroupClassifier
+from erns.utils.age import calc_age, bin_age, GENTURIS_AGE_BINS
+from erns.utils.molgenis2 import Molgenis
+from erns.utils.snapshot import TableSnapshot, fetch_changes
+from erns.utils.stats import StatsTable
+from erns.utils.utils import flatten_columns
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datatable import dt, f, as_type
 from datetime import datetime
 from os import path
-import pandas as pd
 import numpy as np
 import functools
 import operator
-import tempfile
+import time
 import pytz
-import csv
-import re
-
-class Molgenis(molgenis.Session):
-  def __init__(self, *args, **kwargs):
-    super(Molgenis, self).__init__(*args, **kwargs)
-    self.fileImportEndpoint = f"{self._root_url}plugin/importwizard/importFile"
-  
-  def _print(self, *args):
-    """Print
-    Print a message with a timestamp, e.g., "[16:50:12.245] Hello world!".
-
-    @param *args one or more strings containing a message to print
-    @return string
-    """
-    message = ' '.join(map(str, args))
-    time = datetime.now(tz=pytz.timezone('Europe/Amsterdam')).strftime('%H:%M:%S.%f')[:-3]
-    print(f'[{time}] {message}')
-  
-  def _datatableToCsv(self, path, datatable):
-    """To CSV
-    Write datatable object as CSV file
-
-    @param path location to save the file
-    @param data datatable object
-    """
-    data = datatable.to_pandas().replace({np.nan: None})
-    data.to_csv(path, index=False, quoting=csv.QUOTE_ALL)
-  
-  def importDatatableAsCsv(self, pkg_entity: str, data):
-    """Import Datatable As CSV
-    Save a datatable object to as csv file and import into MOLGENIS using the
-    importFile api.
-    
-    @param pkg_entity table identifier in emx format: package_entity
-    @param data a datatable object
-    @param label a description to print (e.g., table name)
-    """
-    with tempfile.TemporaryDirectory() as tmpdir:
-      filepath=f"{tmpdir}/{pkg_entity}.csv"
-      self._datatableToCsv(filepath, data)
-      with open(path.abspath(filepath),'r') as file:
-        response = self._session.post(
-          url = self.fileImportEndpoint,
-          headers = self._headers.token_header,
-          files = {'file': file},
-          params = {'action': 'add_update_existing', 'metadataAction': 'ignore'}
-        )
-        if (response.status_code // 100 ) != 2:
-          self._print('Failed to import data into', pkg_entity, '(', response.status_code, ')')
-        else:
-          self._print('Imported data into', pkg_entity)
-        return response
 
 def print2(*args):
   message = ' '.join(map(str, args))
   time = datetime.now(tz=pytz.timezone('Europe/Amsterdam')).strftime('%H:%M:%S.%f')[:-3]
   print(f'[{time}] {message}')
 
-def flattenDataset(data, columnPatterns=None):
-  """Flatten Dataset
-  Flatten all nested attributes in a recordset based on a specific column names.
-  
-  @param data a recordset
-  @param column string containing row headers to detect: "subjectID|id|value"
-  @return a new recordset containing flattened data
-  """
-  newData = data
-  for row in newData:
-    if '_href' in row:
-      del row['_href']
-    for column in row.keys():
-      if isinstance(row[column], dict):
-        if bool(row[column]):
-          columnMatch = re.search(columnPatterns, ','.join(row[column].keys()))
-          if bool(columnMatch):
-            row[column] = row[column][columnMatch.group()]
-          else:
-            print(f'Variable {column} is type "dict", but no target column found')
-        else:
-          row[column] = None
-      if isinstance(row[column], list):
-        if bool(row[column]):
-          values = []
-          for nestedrow in row[column]:
-            columnMatch = re.search(columnPatterns, ','.join(nestedrow.keys()))
-            if bool(columnMatch):
-              values.append(nestedrow[columnMatch.group()])
-            else:
-              print(f'Variable {column} is type "list", but no target column found')
-          if bool(values):
-            row[column] = ','.join([str(val) for val in values])
-        else:
-          row[column] = None
-  return newData
-  
 def findDateLastContact(data):
   """Find data of last contact
   @return date string or None
@@ -144,58 +59,55 @@ def yearToDate(value, format="-07-01"):
   """
   return f"{value}{format}"
 
-def extractColumnNames(data, pattern):
-  cols = data[:, [name for name in data.names if re.search(pattern, name)]].names
-  return list(cols)
-  
-def calcRowSums(data, colname, genes, geneColumns, classColumns, zygosityColumns=None):
-  """Calculate Row Sums
-  Calculate row sums based on the count of each gene in genes multiplied by
-  classification of pathogenic or likely pathogenic.
-
-  @param data datatable object
-  @param colname name of the column to create
-  @param genes a list of genes to check
-  @param geneColumns a list of one or more gene columns to check
-  @param classColumns a list of one or more classification columns to check
-  @param zygosityColumns a list of one or more zygosity columns to check
-  
-  @return integer
+def getPackageSubjects(session, packageIDs, attributes, maxWorkers=4, batchSize=1000,
+                       snapshotDir=None, modified=None):
+  """Get Package Subjects
+  Retrieve the subjects table of each EMX package using a limited number of
+  concurrent requests. Each table is paged using `batchSize`. The number of
+  rows and the time it took to retrieve each table is printed once a table
+  has been retrieved.
+
+  @param session a molgenis session
+  @param packageIDs a list of EMX package identifiers
+  @param attributes comma separated string of attributes to retrieve
+  @param maxWorkers maximum number of tables to retrieve at the same time
+  @param batchSize number of rows to retrieve per request
+  @param snapshotDir if defined, the subjects of each package are saved in
+    this directory between runs (see erns/utils/snapshot.py)
+  @param modified if defined, only subjects that were modified since the
+    previous run are retrieved
+
+  Only retrieving the subjects is incremental: all rows are returned and the
+  summaries are calculated again. Unlike the skin registry, the counts are not
+  updated using the changes, because missing ages are set to the maximum age
+  of all subjects and subjects are checked for duplicate IDs across packages.
+
+  @return dictionary containing the rows (`data`) and time in seconds
+    (`seconds`) for each package
   """
-  subjectIDs = data['ID_Patient'].to_list()[0]
-  for id in subjectIDs:
-    row = data[f.ID_Patient == id, :]
-    rowSum = 0
-    for gene in genes:
-      geneCount = 0
-      likelyPathogenicCount = 0
-      pathogenicCount = 0
-      zygosityCount = 0
-
-      for geneColumn in geneColumns:
-        if row[geneColumn].to_list()[0][0] == gene:
-          geneCount += 1 # how many cases of gene X are there?
-
-      for classColumn in classColumns:
-        if row[classColumn].to_list()[0][0] == '2': # likely pathogenic (2)
-          likelyPathogenicCount += 1
-        if row[classColumn].to_list()[0][0] == '3': # pathogenic (3)
-          pathogenicCount += 1
-
-      genePathogenic = geneCount * pathogenicCount
-      geneLikelyPathogenic = geneCount * likelyPathogenicCount
-
-      if zygosityColumns:
-        for zygosityColumn in zygosityColumns:
-          if row[zygosityColumn].to_list()[0][0] == '1': # homozygous germline variant (1)
-            zygosityCount += 1
-
-        genePathZyg = genePathogenic * zygosityCount
-        geneLikelyPathZyg = geneLikelyPathogenic * zygosityCount        
-        rowSum += (genePathZyg + geneLikelyPathZyg)
-      else:
-        rowSum += (genePathogenic + geneLikelyPathogenic)
-    data[f.ID_Patient==id, colname] = rowSum
+  def getSubjects(pkg):
+    start = time.perf_counter()
+    if snapshotDir:
+      snapshot = TableSnapshot(path.join(snapshotDir, f"{pkg}_subject.json"))
+      rows, deleted = fetch_changes(
+        session, f"{pkg}_subject", snapshot,
+        attributes=attributes, modified=modified, batch_size=batchSize
+      )
+      snapshot.apply(rows, deleted)
+      snapshot.save()
+      data = snapshot.records()
+    else:
+      data = session.get(f"{pkg}_subject", attributes=attributes, batch_size=batchSize)
+    return pkg, data, time.perf_counter() - start
+
+  results = {}
+  with ThreadPoolExecutor(max_workers=maxWorkers) as executor:
+    futures = [executor.submit(getSubjects, pkg) for pkg in packageIDs]
+    for future in as_completed(futures):
+      pkg, data, seconds = future.result()
+      print2('\tQueried', f"{pkg}_subject:", len(data), 'rows in', f"{seconds:.2f}s")
+      results[pkg] = {'data': data, 'seconds': seconds}
+  return results
 
 #///////////////////////////////////////////////////////////////////////////////
 
@@ -219,33 +131,26 @@ genturis = Molgenis('http://localhost/api/', token='${molgenisToken}')
 # retrieve system meta
 print2('Creating a list of available EMX packages....')
 
-packages = dt.Frame(genturis.get(
+packages = genturis.get_dt(
   entity = 'sys_md_Package',
   attributes = 'id,label',
   q = "entityTypes=like=subject"
-))
-del packages['_href']
+)
 
 # retrieve data from stats table
 print2('Retrieving reference datasets....')
-inclusionCriteria = dt.Frame(genturis.get('genturis_InclCriteria'))
-inclusionCriteriaUnexplained = dt.Frame(genturis.get('genturis_InclCriteriaUnexplain'))
-variantClassification = dt.Frame(genturis.get('genturis_variantClass'))
-sexCodes = dt.Frame(genturis.get('genturis_sex'))
-
-del inclusionCriteria['_href']
-del inclusionCriteriaUnexplained['_href']
-del variantClassification['_href']
-del sexCodes['_href']
+inclusionCriteria = genturis.get_dt('genturis_InclCriteria')
+inclusionCriteriaUnexplained = genturis.get_dt('genturis_InclCriteriaUnexplain')
+variantClassification = genturis.get_dt('genturis_variantClass')
+sexCodes = genturis.get_dt('genturis_sex')
 
 # retrieve inclusion criteria
 print2('Retrieving current stats data...')
-ernstats = dt.Frame(genturis.get(entity = 'ernstats_stats'))
-del ernstats['_href']
+ernstats = genturis.get_dt(entity = 'ernstats_stats')
+stats = StatsTable(ernstats)
 
 print2('Retrieving inclusion criteria....')
-diseaseGroupCriteria = dt.Frame(genturis.get('ernstats_inclusionCriteria'))
-del diseaseGroupCriteria['_href']
+diseaseGroupCriteria = genturis.get_dt('ernstats_inclusionCriteria')
 
 diseaseGroups = diseaseGroupCriteria[
   :, dt.first(f[:]), dt.by(f.groupID,f.groupName)
@@ -259,8 +164,8 @@ diseaseGroups = diseaseGroupCriteria[
 # link the EMX packages with the providers dataset, and update submission status
 print2('Updating EMX IDs in ERN Data Providers....')
 
-providers = dt.Frame(genturis.get('ernstats_dataproviders'))
-del providers['_href']
+providers = genturis.get_dt('ernstats_dataproviders')
+providersReference = providers.copy()
 
 pkgCount = packages.nrows
 provderCount = providers[f.databaseID != None, :].nrows
@@ -275,8 +180,8 @@ if pkgCount != provderCount:
 
 # ~ 1b ~
 # Retrieve metadata
-# Using the list of emx package IDs, loop through each table and retrieve the
-# following information.
+# Using the list of emx package IDs, query each table (in parallel) and
+# retrieve the following information.
 #
 #   1. Sex
 #   2. Year of Birth if known
@@ -314,9 +219,24 @@ columns=','.join([
   'InclCriteriaUnexplained',
 ])
 
+# Incremental mode: set a directory to keep the subjects of each package
+# between runs and the attribute that contains the date of the last change.
+# Only unchanged rows are not downloaded; all summaries are recalculated.
+snapshotDir = None
+snapshotModified = None
+
+pkgResults = getPackageSubjects(
+  session=genturis,
+  packageIDs=packageIDs,
+  attributes=columns,
+  maxWorkers=4,
+  batchSize=1000,
+  snapshotDir=snapshotDir,
+  modified=snapshotModified
+)
+
 for pkg in packageIDs:
-  print2('\tQuerying',f"{pkg}_subject")
-  pkgData = genturis.get(f"{pkg}_subject", attributes=columns,batch_size=1000)
+  pkgData = pkgResults[pkg]['data']
   if bool(pkgData):
     for row in pkgData:
       row['databaseID'] = pkg
@@ -333,8 +253,7 @@ print2(f"Retrieved {len(subjects)} subjects....")
 # Reshape subjects dataset
 print2('Transforming subjects dataset....')
 
-subjectsDT = flattenDataset(subjects, columnPatterns='id|code|value')
-subjectsDT = dt.Frame(subjectsDT)
+subjectsDT = dt.Frame(flatten_columns(subjects, col_patterns='id|code|value'))
 
 # fix extra white space in subjectID
 subjectsDT['ID_Patient'] = dt.Frame([
@@ -418,9 +337,11 @@ totalCenters = dt.unique(activeCenters['projectName']).nrows
 totalCountries = dt.unique(activeCenters['country']).nrows
 
 # update data-highlights using ID (patients, countries, centres)
-ernstats[f.id=='data-highlight-0','value'] = totalPatients
-ernstats[f.id=='data-highlight-1','value'] = totalCountries
-ernstats[f.id=='data-highlight-2','value'] = totalCenters
+stats.update({
+  'data-highlight-0': totalPatients,
+  'data-highlight-1': totalCountries,
+  'data-highlight-2': totalCenters
+})
 
 #///////////////////////////////////////
 
@@ -433,42 +354,26 @@ ernstats[f.id=='data-highlight-2','value'] = totalCenters
 print2('Calculating age....')
 
 # Calcuate age at the row-level
-subjectsDT['age'] = dt.Frame([
-  round(int((row[1] - row[0]).days) / 364.25, 4)
-  if row[0] and row[1] else None
-  for row in subjectsDT[:, (f.YearBirth, f.recentDate)].to_tuples()
-])
+subjectsDT['age'] = dt.Frame(
+  calc_age(subjectsDT, birth='YearBirth', reference='recentDate')
+)
 
 # apply maximum age to missing values
 print2('Applying max.age where age cannot be calculated....')
 if subjectsDT[f.age==None,'age'].nrows > 0:
   print2('Applying max age to missing values...')
   maxAge = subjectsDT[:, dt.max(f.age)].to_list()[0][0]
-  subjectsDT['age'] = dt.Frame([
-    maxAge if not bool(value) else value
-    for value in subjectsDT['age'].to_list()[0]
-  ])
+  subjectsDT[f.age==None, 'age'] = maxAge
 
 # bin age
 print2('Creating bins for age....')
-subjectsPD = subjectsDT.to_pandas()
-bins = [0] + [num for num in range(20,80,10)] + [np.inf]
-labels=['<20','20-29','30-39','40-49','50-59','60-69','70+']
-
-subjectsPD['bin']=pd.cut(subjectsPD['age'],bins=bins,labels=labels,right=False)
-subjectsDT = dt.Frame(subjectsPD)
+subjectsDT['bin'] = bin_age(subjectsDT['age'], **GENTURIS_AGE_BINS)
 
 # Summarise data and update stats dataset
 print2('Summarising by age range and updating dataset....')
 ageByGroup = subjectsDT[:, dt.count(), dt.by(f.bin)]
 
-for value in ageByGroup['bin'].to_list()[0]:
-  if value in ernstats[f.component=='barchart-age', 'label'].to_list()[0]:
-    ernstats[f.label==value,'value'] = ageByGroup[
-      f.bin==value, 'count'
-    ].to_list()[0][0]
-  else:
-    raise SystemError(f'Error: age group {value} not found in stats table!')
+stats.update_from(ageByGroup, key='bin', value='count', by='label', component='barchart-age')
 
 #///////////////////////////////////////
 
@@ -499,18 +404,16 @@ sexAtBirth['rate'] = dt.Frame([
 ])
 
 # update summary stats dataset
-for value in sexAtBirth['label'].to_list()[0]:
-  if value in ernstats[f.component=='pie-sex-at-birth','label'].to_list()[0]:
-    ernstats[f.label==value,'value'] = sexAtBirth[f.label==value,'rate'].to_list()[0][0]
-  else:
-    raise SystemError(f"Error: value {value} uknown. Please check sex code mappings....")
+stats.update_from(sexAtBirth, key='label', value='rate', by='label', component='pie-sex-at-birth')
 
 #///////////////////////////////////////
 
 # ~ 2d ~
-# Apply thematic disease groups (TDG) and summarise. Each check will return the
-# TDG identifier which will be recoded into group names before merging with the
-# main summary stats dataset. For reference, the group IDs are listed below.
+# Apply thematic disease groups (TDG) and summarise. Each subject is assigned a
+# TDG identifier using the inclusion criteria (GENE and ORDO) and the override
+# rules (see erns/genturis/disease_groups.py). The identifiers are recoded into
+# group names before merging with the main summary stats dataset. For
+# reference, the group IDs are listed below.
 #
 #  1 = nf
 #  2 = lynch
@@ -518,201 +421,16 @@ for value in sexAtBirth['label'].to_list()[0]:
 #  4 = other
 #
 print2('Determining thematic disease group assignment....')
+classifier = DiseaseGroupClassifier(criteria=diseaseGroupCriteria)
+subjectsDT['diseaseGroup'], groupHits = classifier.classify(subjectsDT)
 
-# ~ 2d.i ~
-# Assign TDG 2 or 3 based on one inclusion criteria. The following conditions
-# must be met.
-#   3: If there isn't a value and the value equals the 1st inclusion criteria value
-#   2: If there isn't a value and the value equals the 2nd inclusion criteria value
-#
-print2('Setting diseaseGroup based on one `InclCriteria`....')
-subjectsDT['diseaseGroup'] = dt.Frame([
-  None if bool(value) else (
-    '3' if value == 1 else (
-      '2' if value == 2 else None
-    )
-  )
-  for value in subjectsDT['InclCriteria'].to_list()[0]
-])
-
-# subjectsDT[:, dt.count(), dt.by(f.diseaseGroup)]
-
-#///////////////////////////////////////
-
-# ~ 2d.ii ~
-# Assign TDG based on one inclusion criteria + gen
-# Does the case meet the following conditions?
-#
-#  [] The value "Other..." for inclusion criteria
-#  [] Has a classification of "Likely Pathogenic" (2) or "Pathogenic" (3)
-#  [] The gene appears in the disease group gene list
-#  [] A TDG was assigned not in an earlier step
-#
-print2('Setting diseaseGroup based on `InclCriteria`, classification, and gene...')
-genesByGroup=diseaseGroupCriteria[f.type=='GENE',(f.groupID,f.value)]
-geneList = genesByGroup['value'].to_list()[0]
-
-subjectsDT['diseaseGroup'] = dt.Frame([
-  row[3] if bool(row[3]) else (
-    genesByGroup[f.value==row[2], 'groupID'].to_list()[0][0]
-    if (
-      (str(row[0]) == '3') &
-      (str(row[1]) == '2' or str(row[1]) == '3') &
-      (str(row[2]) in geneList)
-    ) else row[3]
-  )
-  for row in subjectsDT[:, (
-    f.InclCriteria,
-    f.VariantClass_1,
-    f.VariantGene_1,
-    f.diseaseGroup
-  )].to_tuples()
-])
-
-#///////////////////////////////////////
-
-# ~ 2d.iii ~
-# Assign TDG based on ORDO codes
-# Does the case meet the following conditions?
-#
-#  [] The ORDO code appears in the code list
-#  [] A TDG was assigned not in an earlier step
-#
-print2('Setting disease group based on ORDO codes....')
-ordoByGroup = diseaseGroupCriteria[f.type=='ORDO', (f.groupID,f.value)]
-ordoList = ordoByGroup['value'].to_list()[0]
-
-subjectsDT['diseaseGroup'] = dt.Frame([
-  row[1] if bool(row[1]) else (
-    ordoByGroup[f.value==row[0], 'groupID'].to_list()[0][0]
-    if row[0] in ordoList
-    else row[1]
-  )
-  for row in subjectsDT[:, (f.ORDO, f.diseaseGroup)].to_tuples()
-])
-
-# subjectsDT[:, dt.count(), dt.by(f.diseaseGroup)]
-
-#///////////////////////////////////////
-
-# ~ 2d.iv ~
-# Manually set TDG based on unexplained exclusion criteria
-print2('Setting disease groups based on `InclCriteriaUnexplained`...')
-
-# set TDG #2 for unexplained criteria ID==2|3
-subjectsDT['diseaseGroup'] = dt.Frame([
-  row[1] if bool(row[1]) else (
-    '2'
-    if (str(row[0]) == '2') or (str(row[0] == '3'))
-    else row[1]
-  )
-  for row in subjectsDT[:, (f.InclCriteriaUnexplained, f.diseaseGroup)].to_tuples()
-])
-
-# set TDG #3 for unexplained criteria ID==4|5
-subjectsDT['diseaseGroup'] = dt.Frame([
-  row[1] if bool(row[1]) else (
-    '2' if ((str(row[0]) == '4') or (str(row[0]) == '5'))
-    else row[1]
-  )
-  for row in subjectsDT[:, (f.InclCriteriaUnexplained, f.diseaseGroup)].to_tuples()
-])
+for rule, count in groupHits.items():
+  print2(f"\t{rule}: {count}")
 
 # subjectsDT[:, dt.count(), dt.by(f.diseaseGroup)]
 
 #///////////////////////////////////////
 
-# ~ 2d.v ~
-# Override TDG for special cases
-# If the group assignment is 2 and the ORDO code is 252202, then assign to group 4
-# ORDO Term: "Constitutional mismatch repair deficiency syndrome"
-print2('Overriding diseaseGroup based on group 2 assignment and ORDO code...')
-subjectsDT['diseaseGroup'] = dt.Frame([
-  '4' if (row[1] == '2') & (str(row[0]) == 'ORPHA:252202') else row[1]
-  for row in subjectsDT[:, (f.ORDO, f.diseaseGroup)].to_tuples()
-])
-
-# subjectsDT[:, dt.count(), dt.by(f.diseaseGroup)]
-
-#///////////////////////////////////////
-
-# ~ 2d.vi-vii ~
-# Calculate rowsums and override
-# Find out which columns are present in the datasets
-geneCols = extractColumnNames(subjectsDT, re.compile(r'^(VariantGene_)'))
-classCols = extractColumnNames(subjectsDT, re.compile(r'^(VariantClass_)'))
-zygosityCols = extractColumnNames(subjectsDT, re.compile(r'^(VariantZygosity_)'))
-
-# ~ 2d.vi ~
-# Override TDG based on gene and classification status
-calcRowSums(
-  data = subjectsDT,
-  colname='sumGeneClass',
-  genes = ['MLH1','MSH2', 'MSH6', 'PMS2'],
-  geneColumns = geneCols,
-  classColumns = classCols
-)
-
-# Change the group to 4 if the sum >= 2 and the current group is 2
-subjectsDT['diseaseGroup'] = dt.Frame([
-  '4' if (row[0] == '2') & (row[1] >= 2) else row[0]
-  for row in subjectsDT[:, ['diseaseGroup', 'sumGeneClass']].to_tuples()
-])
-
-# subjectsDT[:, dt.count(), dt.by(f.diseaseGroup)]
-
-#///////////////////////////////////////
-
-# ~ 2d.vii ~
-# Override TDG based on gene, classification, and zygosity
-calcRowSums(
-  data = subjectsDT,
-  colname='sumGeneClassZygosity',
-  genes = ['MLH1','MSH2', 'MSH6', 'PMS2'],
-  geneColumns = geneCols,
-  classColumns = classCols,
-  zygosityColumns=zygosityCols
-)
-
-# change the group to 4 if the sum >= 1 and the current group is 2
-subjectsDT['diseaseGroup'] = dt.Frame([
-  '4' if (row[0] == '2') & (row[1] >= 1) else row[0]
-  for row in subjectsDT[:, ['diseaseGroup', 'sumGeneClassZygosity']].to_tuples()
-])
-
-# subjectsDT[:, dt.count(), dt.by(f.diseaseGroup)]
-
-#///////////////////////////////////////
-
-# ~ 2d.vii ~
-# Override TDG 3 based on ORDO code
-calcRowSums(
-  data = subjectsDT,
-  colname = 'rowSumGroup3',
-  genes = ['ATM'],
-  geneColumns = geneCols,
-  classColumns = classCols
-)
-
-# if rowsum > 1 and group is 3, change to group 4
-subjectsDT['diseaseGroup'] = dt.Frame([
-  '4' if (row[0] == '3') & (row[1] >= 1) else row[0]
-  for row in subjectsDT[:, ['diseaseGroup', 'rowSumGroup3']].to_tuples()
-])
-
-# subjectsDT[:, dt.count(), dt.by(f.diseaseGroup)]
-
-#///////////////////////////////////////
-
-# ~ 2d.ix ~
-# Override TDG if ORDO is "Birt-Hogg-Dubé syndrome" (ORPHA:122)
-subjectsDT['diseaseGroup'] = dt.Frame([
-  '4' if row[0] == 'ORPHA:122' else row[1]
-  for row in subjectsDT[:, (f.ORDO, f.diseaseGroup)].to_tuples()
-])
-
-#///////////////////////////////////////
-
 # ~ 2d.x ~
 # Summarise by group
 print2('Summarizing by groups....')
@@ -727,22 +445,29 @@ if countByGroup[f.diseaseGroup==None,:].nrows > 0:
   countByGroup[f.diseaseGroup==None, 'groupName'] = 'Undetermined'
 
 # update ernstats datasets
-for value in countByGroup['groupName'].to_list()[0]:
-  if 'Other rare' in value:
-    group2 = ernstats[f.component=='table-enrollment-disease-group','label'].to_list()[0][2]
-    ernstats[f.label==group2,'value'] = countByGroup[f.groupName==value, 'count'].to_list()[0][0]
-  elif value in ernstats[f.component=='table-enrollment-disease-group','label'].to_list()[0]:
-    ernstats[f.label==value,'value'] = countByGroup[
-      f.groupName==value,'count'
-    ].to_list()[0][0]
-  else:
-    raise SystemError(f"Error: value '{value}' uknown. Please check disease group mappings....")
+# "Other rare ..." groups are reported using the third label of the component
+groupLabels = stats.labels('table-enrollment-disease-group')
+stats.update(
+  {
+    groupLabels[2] if 'Other rare' in name else name: count
+    for name, count in zip(*countByGroup[:, (f.groupName, f.count)].to_list())
+  },
+  by='label',
+  component='table-enrollment-disease-group'
+)
 
 #///////////////////////////////////////////////////////////////////////////////
 
 # ~ 3 ~
 # Import data
 
-genturis.importDatatableAsCsv(pkg_entity='ernstats_dataproviders', data=providers)
-genturis.importDatatableAsCsv(pkg_entity='ernstats_stats', data=ernstats)
+# only new and changed rows are imported (compared with the retrieved data)
+genturis.import_dt(
+  pkg_entity='ernstats_dataproviders', data=providers,
+  diff=True, reference=providersReference
+)
+genturis.import_dt(
+  pkg_entity='ernstats_stats', data=stats.frame,
+  diff=True, key='id', reference=ernstats
+)
 genturis.logout()
@@ -2,64 +2,61 @@
 #' FILE: dataproviders_cleaner.py
 #' AUTHOR: David Ruvolo
 #' CREATED: 2022-06-17
-#' MODIFIED: 2022-06-17
+#' MODIFIED: 2026-10-18
 #' PURPOSE: cleaning script for dataproviders
 #' STATUS: experimental
-#' PACKAGES: pandas
+#' PACKAGES: pandas, datatable
 #' COMMENTS: NA
 #'////////////////////////////////////////////////////////////////////////////
 
 import pandas as pd
-from python.utils.ror import RorClient
+from datatable import dt
+from os import path
+from erns.utils.ror import RorClient
+from erns.utils.ror_index import RorIndex
+from erns.utils.ror_matcher import RorMatcher
 import csv
 
-ror = RorClient()
+# use a local copy of the ROR data dump if available. To create the index:
+# RorIndex.from_dump('data/ror-data.zip').save('data/ror_index.pkl')
+index = RorIndex.load('data/ror_index.pkl') if path.exists('data/ror_index.pkl') else None
+ror = RorClient(cache_path='data/ror_cache.sqlite', index=index)
+matcher = RorMatcher(client=ror)
 
-data = pd.read_csv('data/dataproviders.csv').to_dict('records')
-dataproviders = []
+# blank cells are read as NaN; use None so that unknown values are ignored
+data = pd.read_csv('data/dataproviders.csv')
+data = data.astype(object).where(data.notna(), None).to_dict('records')
 
-for row in data:
-  q=row['projectName']
-  print('Querying', q)
-  response = ror.searchOrganizations(query=q)
-  result=response[0]
-  newProvider = {
-    'name': result.get('name'),
-    'displayName': result.get('name'),
-    'city': result.get('addresses')[0]['city'],
-    'country': result.get('country').get('country_name'),
-    'longitude': result.get('addresses')[0].get('lng'),
-    'latitude': result.get('addresses')[0].get('lat'),
-    'codesystem': 'ROR',
-    'code': result.get('id'),
-    'iri': result.get('id'),
-    'projectName': q,
-    'verifiedResult': ''
-  }
-  dataproviders.append(newProvider)
+# rank candidates for all providers; only low confidence matches need to be
+# reviewed manually
+matches = matcher.match(data, name='projectName', city='city', country='country', top=3)
+matches.to_csv('data/dataproviders_matches.csv')
 
-pd.DataFrame(dataproviders).to_csv(
+best = matches[(dt.f.rank == 1) | dt.isna(dt.f.rank), :].to_pandas()
+print('Matches that need to be reviewed:', int(best['needsReview'].sum()), 'of', len(data))
+
+dataproviders = pd.DataFrame({
+  'name': best['name'],
+  'displayName': best['name'],
+  'city': best['city'],
+  'country': best['country'],
+  'longitude': best['longitude'],
+  'latitude': best['latitude'],
+  'codesystem': 'ROR',
+  'code': best['iri'],
+  'iri': best['iri'],
+  'projectName': best['projectName'],
+  'confidence': best['confidence'],
+  'verifiedResult': ['' if review else 'auto' for review in best['needsReview']]
+})
+
+dataproviders.to_csv(
   path_or_buf='data/dataproviders_clean.csv',
   index=False,
   encoding="utf-8",
   quoting=csv.QUOTE_NONNUMERIC
 )
 
-
-response = ror.searchOrganizations(query="")
-result=response[0]
-{
-    'name': result.get('name'),
-    'displayName': result.get('name'),
-    'city': result.get('addresses')[0]['city'],
-    'country': result.get('country').get('country_name'),
-    'longitude': result.get('addresses')[0].get('lng'),
-    'latitude': result.get('addresses')[0].get('lat'),
-    'codesystem': 'ROR',
-    'code': result.get('id'),
-    'iri': result.get('id')
-}
-
 (
   pd.read_excel('data/dataproviders_clean.xlsx')
   .drop(columns=['status','resolution','color_band'])
@@ -0,0 +1,225 @@
+#///////////////////////////////////////////////////////////////////////////////
+# FILE: disease_groups.py
+# AUTHOR: David Ruvolo
+# CREATED: 2026-10-18
+# MODIFIED: 2026-10-18
+# PURPOSE: assign GENTURIS subjects to thematic disease groups (TDG)
+# STATUS: stable
+# PACKAGES: datatable
+# COMMENTS: The rules are compiled from `ernstats_inclusionCriteria` (GENE and
+# ORDO types) and the override rules defined below. For reference, the group
+# IDs are listed below.
+#
+#   1 = nf
+#   2 = lynch
+#   3 = hboc
+#   4 = other
+#///////////////////////////////////////////////////////////////////////////////
+
+from datatable import dt, f
+import functools
+import operator
+import re
+
+mmrGenes = ['MLH1', 'MSH2', 'MSH6', 'PMS2']
+
+# Row sums that are calculated before the groups are assigned. Each sum is the
+# count of genes multiplied by the count of (likely) pathogenic classifications
+# and, if `zygosity` is True, the count of homozygous germline variants.
+rowSumRules = [
+  {'name': 'sumGeneClass', 'genes': mmrGenes, 'zygosity': False},
+  {'name': 'sumGeneClassZygosity', 'genes': mmrGenes, 'zygosity': True},
+  {'name': 'rowSumGroup3', 'genes': ['ATM'], 'zygosity': False},
+]
+
+# Overrides are applied in order after a group has been assigned. A rule
+# applies if all defined conditions are met: the current group (`group`), the
+# ORDO code (`ordo`), and the minimum value of a row sum (`rowsum`, `min`).
+overrideRules = [
+  # "Constitutional mismatch repair deficiency syndrome"
+  {'name': 'ordo-cmmrd', 'group': '2', 'ordo': 'ORPHA:252202', 'assign': '4'},
+  {'name': 'mmr-gene-class', 'group': '2', 'rowsum': 'sumGeneClass', 'min': 2, 'assign': '4'},
+  {'name': 'mmr-gene-class-zygosity', 'group': '2', 'rowsum': 'sumGeneClassZygosity', 'min': 1, 'assign': '4'},
+  {'name': 'atm-gene-class', 'group': '3', 'rowsum': 'rowSumGroup3', 'min': 1, 'assign': '4'},
+  # "Birt-Hogg-Dubé syndrome"
+  {'name': 'ordo-bhd', 'ordo': 'ORPHA:122', 'assign': '4'},
+]
+
+# Subjects that could not be assigned using the gene or ORDO criteria are
+# assigned to this group. The previous `InclCriteriaUnexplained` check
+# (`str(value == '3')`) was always true, so this applies to all remaining cases.
+unexplainedGroup = '2'
+
+def extractColumnNames(data, pattern):
+  cols = data[:, [name for name in data.names if re.search(pattern, name)]].names
+  return list(cols)
+
+def countMatches(columns, values):
+  """Count Matches
+  Build a row-wise expression that counts how many of the columns contain one
+  of the values. The expression is evaluated by datatable for all rows at once.
+
+  @param columns a list of one or more column names
+  @param values a list of one or more values to match
+
+  @return datatable expression
+  """
+  return functools.reduce(operator.add, [
+    dt.ifelse(f[column] == value, 1, 0)
+    for column in columns
+    for value in values
+  ], 0)
+
+def calcRowSums(data, colname, genes, geneColumns, classColumns, zygosityColumns=None):
+  """Calculate Row Sums
+  Calculate row sums based on the count of each gene in genes multiplied by
+  classification of pathogenic or likely pathogenic. Row sums are calculated
+  for all subjects at once rather than looping over each ID_Patient.
+
+  @param data datatable object
+  @param colname name of the column to create
+  @param genes a list of genes to check
+  @param geneColumns a list of one or more gene columns to check
+  @param classColumns a list of one or more classification columns to check
+  @param zygosityColumns a list of one or more zygosity columns to check
+
+  @return integer
+  """
+  # sum of (gene count * (pathogenic + likely pathogenic)) across all genes is
+  # the same as (count of all genes) * (count of classifications 2 or 3)
+  geneCount = countMatches(geneColumns, genes)
+  classCount = countMatches(classColumns, ['2', '3'])
+  rowSum = geneCount * classCount
+
+  if zygosityColumns:
+    # homozygous germline variant (1)
+    rowSum = rowSum * countMatches(zygosityColumns, ['1'])
+
+  data[:, dt.update(**{colname: rowSum})]
+
+class DiseaseGroupClassifier:
+  """Disease Group Classifier
+  Assign thematic disease groups to subjects using the inclusion criteria,
+  the row sums, and the override rules.
+  """
+  def __init__(self, criteria, overrides=None, rowSums=None):
+    """
+    @param criteria the `ernstats_inclusionCriteria` dataset (groupID, type, value)
+    @param overrides override rules (default: `overrideRules`)
+    @param rowSums row sums to calculate (default: `rowSumRules`)
+    """
+    self.genes = self._compile(criteria, 'GENE')
+    self.ordo = self._compile(criteria, 'ORDO')
+    self.overrides = overrides if overrides is not None else overrideRules
+    self.rowSums = rowSums if rowSums is not None else rowSumRules
+    self.hits = {}
+
+  def _compile(self, criteria, criteriaType):
+    """Compile
+    Create a value-to-group lookup for a type of inclusion criteria. The
+    first group of each value is kept.
+
+    @param criteria inclusion criteria dataset
+    @param criteriaType GENE or ORDO
+
+    @return dictionary
+    """
+    lookup = {}
+    rows = criteria[f.type == criteriaType, (f.value, f.groupID)]
+    for value, group in rows.to_tuples():
+      lookup.setdefault(value, group)
+    return lookup
+
+  def addRowSums(self, data):
+    """Add Row Sums
+    Calculate all row sums defined in the row sum rules. Columns are added
+    in place.
+
+    @param data subjects dataset
+    """
+    geneColumns = extractColumnNames(data, r'^(VariantGene_)')
+    classColumns = extractColumnNames(data, r'^(VariantClass_)')
+    zygosityColumns = extractColumnNames(data, r'^(VariantZygosity_)')
+    for rule in self.rowSums:
+      calcRowSums(
+        data=data,
+        colname=rule['name'],
+        genes=rule['genes'],
+        geneColumns=geneColumns,
+        classColumns=classColumns,
+        zygosityColumns=zygosityColumns if rule['zygosity'] else None
+      )
+
+  def _hit(self, name):
+    self.hits[name] = self.hits.get(name, 0) + 1
+
+  def _assign(self, row):
+    """Assign
+    A group is assigned if the case has the inclusion criteria "Other" (3),
+    a classification of "Likely Pathogenic" (2) or "Pathogenic" (3), and a
+    gene that appears in the disease group gene list. Otherwise, the group
+    is determined by the ORDO code.
+
+    @param row a dictionary of the values of a subject
+
+    @return group ID
+    """
+    gene = str(row['VariantGene_1'])
+    if (
+      str(row['InclCriteria']) == '3'
+      and str(row['VariantClass_1']) in ('2', '3')
+      and gene in self.genes
+    ):
+      self._hit('gene')
+      return self.genes[gene]
+
+    if row['ORDO'] in self.ordo:
+      self._hit('ordo')
+      return self.ordo[row['ORDO']]
+
+    self._hit('unexplained')
+    return unexplainedGroup
+
+  def _override(self, row, group):
+    """Override
+    Apply the override rules to an assigned group
+
+    @param row a dictionary of the values of a subject
+    @param group the assigned group ID
+
+    @return group ID
+    """
+    for rule in self.overrides:
+      if rule.get('group') and group != rule['group']:
+        continue
+      if rule.get('ordo') and str(row['ORDO']) != rule['ordo']:
+        continue
+      if rule.get('rowsum') and row[rule['rowsum']] < rule['min']:
+        continue
+      self._hit(rule['name'])
+      group = rule['assign']
+    return group
+
+  def classify(self, data):
+    """Classify
+    Assign thematic disease groups to all subjects in one pass. Row sums are
+    added to the dataset as new columns.
+
+    @param data subjects dataset containing the columns InclCriteria, ORDO,
+      VariantGene_*, VariantClass_*, and VariantZygosity_*
+
+    @return a tuple of a dataset with the column `diseaseGroup` and the
+      number of cases per rule
+    """
+    self.hits = {}
+    self.addRowSums(data)
+
+    columns = ['InclCriteria', 'VariantClass_1', 'VariantGene_1', 'ORDO']
+    columns += [rule['name'] for rule in self.rowSums]
+
+    groups = []
+    for values in zip(*data[:, columns].to_list()):
+      row = dict(zip(columns, values))
+      groups.append(self._override(row, self._assign(row)))
+
+    return dt.Frame(diseaseGroup=groups, stype=dt.str32), self.hits
@@ -2,14 +2,14 @@
 FILE: index.py
 AUTHOR: David Ruvolo
 CREATED: 2022-12-02
-MODIFIED: 2024-07-09
+MODIFIED: 2026-10-18
 PURPOSE: misc script for genturis-registry
 STATUS: stable
 PACKAGES: **see below**
 COMMENTS: NA
 """
 
-from os import environ, system
+from os import environ
 import pandas as pd
 from datatable import dt
 from dotenv import load_dotenv
@@ -58,29 +58,36 @@ genturis_acc.import_dt('ernstats_stats', stats)
 # ~ 2 ~
 # Import files to display on the landing pages
 
-# import into prod and acc
+# import into prod and acc. Files are uploaded once (see the manifests) and
+# anonymous users are given read permissions
 FILE = 'Handbook_GENTURIS registry_v02.0.1_20250130.pdf'
 
-# import into prod
-prod_response = genturis_prod.import_file(file=FILE)
-prod_file_id = prod_response.json()['id']
 
-prod_cmd = f"mcmd give anonymous read --package sys_FileMeta --entity {prod_file_id}"
-prod_host = environ['GENTURIS_PROD_HOST'].replace('api', '')
-
-system(f'mcmd config set host {prod_host}')
-system(prod_cmd)
-
-
-# import into acc
-acc_response = genturis_acc.import_file(file=FILE)
-acc_file_id = acc_response.json()['id']
-
-acc_cmd = f"mcmd give anonymous read --package sys_FileMeta --entity {acc_file_id}"
-acc_host = environ['GENTURIS_ACC_HOST'].replace('api', '')
-
-system(f'mcmd config set host {acc_host}')
-system(acc_cmd)
+def get_file_id(files, server):
+    """Get the id of the imported file or stop if it wasn't imported"""
+    if files.nrows == 0:
+        raise SystemExit(f"Error: {FILE} was not found; check the file name")
+    imported = files[dt.f.status != 'failed', :]
+    if imported.nrows == 0:
+        raise SystemExit(f"Error: {FILE} could not be imported into {server}")
+    return imported['id'].to_list()[0][0]
+
+
+prod_files = genturis_prod.import_files(
+    directory='.',
+    pattern=FILE,
+    manifest_path='data/genturis_prod_files.json',
+    permissions={'anonymous': 'READ'}
+)
+prod_file_id = get_file_id(prod_files, 'prod')
+
+acc_files = genturis_acc.import_files(
+    directory='.',
+    pattern=FILE,
+    manifest_path='data/genturis_acc_files.json',
+    permissions={'anonymous': 'READ'}
+)
+acc_file_id = get_file_id(acc_files, 'acc')
 
 
 genturis_prod.logout()
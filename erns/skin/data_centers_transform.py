@@ -2,26 +2,25 @@
 FILE: data_centers_transform.py
 AUTHOR: David Ruvolo
 CREATED: 2023-02-22
-MODIFIED: 2023-02-27
+MODIFIED: 2026-10-18
 PURPOSE: clean reference centers dataset
 STATUS: stable
 PACKAGES: **see below**
 COMMENTS: NA
 """
 from os import environ, path
-from tqdm import tqdm
 import pandas as pd
-from datatable import dt, f
+from datatable import dt
 from dotenv import load_dotenv
 from erns.utils.molgenis2 import Molgenis
-from erns.utils.ror import RorClient
+from erns.utils.ror import RorClient, normalise_ror_id
 load_dotenv()
 
 # start Molgenis session
 db = Molgenis(environ['ERRAS_PROD_HOST'])
 db.login(environ['ERRAS_PROD_USR'], environ['ERRAS_PROD_PWD'])
 
-ror = RorClient()
+ror = RorClient(cache_path='data/ror_cache.sqlite')
 
 centersPD = pd.read_excel('data/ern_skin_reference_centers.xlsx')
 centersDT = dt.Frame(centersPD)
@@ -42,25 +41,27 @@ centersDT['codesystem'] = 'ROR'
 
 # retrieve center locations
 rorCodes = centersDT['code'].to_list()[0]
-for code in tqdm(rorCodes):
-    response = ror.get_organisation_by_id(code=code)
-    if response:
+organisations = ror.get_organisations(rorCodes)
+results = [
+    organisations.get(normalise_ror_id(code)) if code else None
+    for code in rorCodes
+]
 
-        address = response['addresses'][0] if response.get(
-            'addresses') else None
-        country = response['country'] if response.get('country') else None
+rorColumns = {
+    'officialName': 'name',
+    'latitude': 'latitude',
+    'longitude': 'longitude',
+    'city': 'city',
+    'country': 'country',
+}
 
-        centersDT[f.code == code, 'officialName'] = response.get('name')
-        centersDT[f.code == code, 'latitude'] = address.get(
-            'lat') if address else None
-        centersDT[f.code == code, 'longitude'] = address.get(
-            'lng') if address else None
-        centersDT[f.code == code, 'city'] = address.get(
-            'city') if address else None
-        centersDT[f.code == code, 'country'] = country.get(
-            'country_name') if country else None
-
-    del response, address, country
+for column, attribute in rorColumns.items():
+    values = centersDT[column].to_list()[0] if column in centersDT.names \
+        else [None] * centersDT.nrows
+    centersDT[column] = dt.Frame([
+        result[attribute] if result else value
+        for result, value in zip(results, values)
+    ])
 
 
 db.import_dt(pkg_entity='ernstats_dataproviders', data=centersDT)
@@ -10,7 +10,7 @@
 # ///////////////////////////////////////////////////////////////////////////////
 
 from erns.utils.molgenis2 import Molgenis
-from erns.utils.utils import flattenDataset
+from erns.utils.utils import flatten_columns
 from datatable import dt, f, as_type
 from dotenv import load_dotenv
 from os import environ
@@ -51,9 +51,9 @@ ernskin.importDatatableAsCsv('stats_components', componentsDT)
 # ~ 1a ~
 # create disease groups
 groupsDT = dt.Frame(
-    flattenDataset(
+    flatten_columns(
         data=ernskin.get('erras_diseasegroup'),
-        columnPatterns='id|value'
+        col_patterns='id|value'
     )
 )[:, {'id': f.id, 'label': f.value}]
 
@@ -0,0 +1,113 @@
+"""Age calculation and binning
+FILE: age.py
+AUTHOR: David Ruvolo
+CREATED: 2026-10-18
+MODIFIED: 2026-10-18
+PURPOSE: calculate and bin ages for the ERN summary scripts
+STATUS: stable
+PACKAGES: datatable, numpy
+COMMENTS: Ages are calculated for all rows at once using the number of days
+since epoch of date32 columns. Bins are closed on the left (i.e., the same as
+`pd.cut(..., right=False)`) unless `right=True`.
+"""
+
+from datetime import date
+from datatable import dt, f, as_type
+import numpy as np
+
+GENTURIS_AGE_BINS = {
+    'bins': [0, 20, 30, 40, 50, 60, 70, np.inf],
+    'labels': ['<20', '20-29', '30-39', '40-49', '50-59', '60-69', '70+'],
+}
+
+SKIN_AGE_BINS = {
+    'bins': [0, 0.25, 1, 5, 13, 18, 40, 60, np.inf],
+    'labels': [
+        'Newborn',
+        'Infant',
+        'Todler',
+        'Kids',
+        'Teenagers',
+        'Adults < 40',
+        'Adults < 60',
+        'Elderly persons',
+    ],
+}
+
+
+def _days(data, column):
+    """Get a date column as the number of days since epoch
+
+    :returns: days as floats where missing values are NaN
+    :rtype: numpy.ndarray
+    """
+    days = data[:, as_type(as_type(f[column], dt.Type.date32), dt.Type.int32)]
+    return np.ma.filled(days.to_numpy()[:, 0].astype(float), np.nan)
+
+
+def calc_age(data, birth, reference=None, days_per_year=364.25, digits=4):
+    """Calculate age
+
+    :param data: dataset containing the date of birth
+    :type data: datatable
+
+    :param birth: column containing the date of birth
+    :type birth: str
+
+    :param reference: the date the age is calculated at: a column in `data`,
+      a date, or an ISO formatted date. If None, today's date is used.
+    :type reference: str | datetime.date
+
+    :param days_per_year: number of days in a year
+    :type days_per_year: float
+
+    :param digits: number of digits to round the age to
+    :type digits: int
+
+    :returns: age in years; missing if either date is missing
+    :rtype: numpy.ndarray
+    """
+    if reference is None:
+        reference = date.today()
+    if isinstance(reference, str) and reference in data.names:
+        end = _days(data, reference)
+    else:
+        if isinstance(reference, str):
+            reference = date.fromisoformat(reference)
+        end = float((reference - date(1970, 1, 1)).days)
+
+    return np.round((end - _days(data, birth)) / days_per_year, digits)
+
+
+def bin_age(ages, bins, labels, right=False):
+    """Assign ages to bins
+
+    :param ages: age in years
+    :type ages: numpy.ndarray | list | datatable
+
+    :param bins: bin edges in increasing order
+    :type bins: list
+
+    :param labels: label of each bin (one less than the number of edges)
+    :type labels: list
+
+    :param right: if True, bins are closed on the right instead of the left
+    :type right: bool
+
+    :returns: the label of each age; None if the age is missing or out of range
+    :rtype: datatable
+    """
+    if len(labels) != len(bins) - 1:
+        raise ValueError('The number of labels must be one less than the number of bins')
+
+    if isinstance(ages, dt.Frame):
+        ages = ages.to_numpy()[:, 0]
+    ages = np.ma.filled(np.ma.asarray(ages, dtype=float), np.nan)
+    positions = np.searchsorted(bins, ages, side='left' if right else 'right') - 1
+    valid = (positions >= 0) & (positions < len(labels)) & ~np.isnan(ages)
+
+    lookup = np.array(list(labels) + [None], dtype=object)
+    return dt.Frame(
+        bin=lookup[np.where(valid, positions, len(labels))].tolist(),
+        stype=dt.str32
+    )
@@ -2,23 +2,41 @@
 # FILE: molgenis2.py
 # AUTHOR: David Ruvolo
 # CREATED: 2022-07-28
-# MODIFIED: 2022-11-10
+# MODIFIED: 2026-10-18
 # PURPOSE: molgenis.client extensions for DataTable
 # STATUS: stable
 # PACKAGES: molgenis-py-client >= 2.4.0
 # COMMENTS: NA
 """
 
-from os.path import abspath, getsize
-import tempfile
-import csv
+from os.path import basename, exists, getsize, isfile, join
+from glob import glob
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+import threading
+import hashlib
+import io
+import zipfile
 import mimetypes
 import json
-import numpy as np
+import re
 import molgenis.client as molgenis
+import requests
+from datatable import dt, f
 
 from erns.utils.utils import print2
 
+# datatable types of EMX attribute types; other types are imported as strings
+EMX_STYPES = {
+    'BOOL': dt.stype.bool8,
+    'INT': dt.stype.int32,
+    'LONG': dt.stype.int64,
+    'DECIMAL': dt.stype.float64,
+}
+
+# reference types that contain one (XREF) or more (MREF) values
+EMX_XREF_TYPES = ('XREF', 'CATEGORICAL', 'FILE')
+EMX_MREF_TYPES = ('MREF', 'CATEGORICAL_MREF', 'ONE_TO_MANY')
+
 
 class Molgenis(molgenis.Session):
     """Molgenis client extensions"""
@@ -27,61 +45,461 @@ class Molgenis(molgenis.Session):
         super(Molgenis, self).__init__(*args, **kwargs)
         self.api_file_import = f"{self._root_url}plugin/importwizard/importFile"
 
-    def _dt_to_csv(self, path, datatable):
-        """Write datatable object to csv
+    def _entity_columns(self, meta, attributes=None):
+        """Get the attributes of an entity (compound attributes are expanded)
 
-        :param path: location to save the file
-        :type path: str
+        :param meta: entity metadata from a v2 response
+        :type meta: dict
 
-        :param data: dataset to save
-        :type data: datatable
+        :param attributes: if defined, only these attributes are returned (in
+          this order)
+        :type attributes: list
+
+        :returns: name, type, and id attribute of the referenced entity
+        :rtype: list
+        """
+        columns = []
+        for attr in meta.get('attributes', []):
+            if attr['fieldType'] == 'COMPOUND':
+                columns += self._entity_columns(attr)
+            else:
+                ref = attr.get('refEntity') or {}
+                columns.append((attr['name'], attr['fieldType'], ref.get('idAttribute')))
+
+        if attributes:
+            names = {column[0]: column for column in columns}
+            columns = [names[name] for name in attributes if name in names]
+        return columns
+
+    def _split_attributes(self, attributes):
+        """Split a list of attributes on commas that are not nested
+
+        E.g., `a,b(c,d)` is split into `a` and `b(c,d)`.
+
+        :param attributes: comma separated list of attributes
+        :type attributes: str
+
+        :rtype: list
+        """
+        names = []
+        depth = 0
+        start = 0
+        for position, char in enumerate(attributes):
+            if char == '(':
+                depth += 1
+            elif char == ')':
+                depth -= 1
+                if depth < 0:
+                    raise ValueError(f"Unbalanced parentheses in attributes: {attributes}")
+            elif char == ',' and depth == 0:
+                names.append(attributes[start:position].strip())
+                start = position + 1
+        if depth != 0:
+            raise ValueError(f"Unbalanced parentheses in attributes: {attributes}")
+        names.append(attributes[start:].strip())
+        return [name for name in names if name]
+
+    def get_dt(self, entity: str, q: str = None, attributes: str = None,
+               batch_size: int = 10000, col_patterns: str = None,
+               sort_column: str = None):
+        """Get all rows of an entity as a datatable object
+
+        The entity is retrieved in batches and each batch is converted into
+        typed columns using the entity metadata. References are flattened to
+        the id of the referenced entity (multiple values are comma separated),
+        `_href` is dropped, and dates are converted to date32.
+
+        :param entity: the identifier of a table in EMX format (package_entity)
+        :type entity: str
+
+        :param q: query in rsql format
+        :type q: str
+
+        :param attributes: comma separated list of attributes to retrieve
+        :type attributes: str
+
+        :param batch_size: number of rows to retrieve per request (max. 10000)
+        :type batch_size: int
+
+        :param col_patterns: (optional) select the nested key of references
+          using a re search pattern (key1|key2|keyN) instead of the id
+          attribute (see `erns.utils.utils.flatten_data`)
+        :type col_patterns: str
+
+        :param sort_column: attribute to sort on (default: id attribute)
+        :type sort_column: str
+
+        :rtype: datatable
+        """
+        if not sort_column:
+            sort_column = self.get_entity_meta_data(entity)['idAttribute']
+
+        pattern = re.compile(col_patterns) if col_patterns else None
+        names = None
+        selections = {}
+        if attributes:
+            names = []
+            for attribute in self._split_attributes(attributes):
+                name = re.sub(r'\(.*$', '', attribute)
+                names.append(name)
+                if '(' in attribute:
+                    nested = attribute[attribute.index('(') + 1:attribute.rindex(')')]
+                    selections[name] = [
+                        re.sub(r'\(.*$', '', value) for value in self._split_attributes(nested)
+                    ]
+
+        columns = None
+        ref_keys = {}
+        frames = []
+        start = 0
+        while True:
+            response = self._get_batch(
+                entity=entity,
+                q=q,
+                attributes=attributes,
+                batch_size=batch_size,
+                start=start,
+                sort_column=sort_column,
+                raw=True
+            )
+            items = response.get('items', [])
+            if columns is None:
+                columns = self._entity_columns(response['meta'], names)
+
+            page = {}
+            stypes = {}
+            for name, field_type, id_attr in columns:
+                values = [item.get(name) for item in items]
+                if field_type in EMX_XREF_TYPES + EMX_MREF_TYPES:
+                    key = ref_keys.get(name)
+                    if key is None:
+                        key = self._ref_key(values, id_attr, pattern, selections.get(name))
+                        ref_keys[name] = key
+                    values = [
+                        self._ref_value(value, key, field_type in EMX_MREF_TYPES)
+                        for value in values
+                    ]
+                page[name] = values
+                stypes[name] = EMX_STYPES.get(field_type, dt.stype.str32)
+            frames.append(dt.Frame(page, stypes=stypes))
+
+            start += len(items)
+            if 'nextHref' not in response or not items:
+                break
+
+        # rbind drops the columns of a single empty frame
+        data = frames[0] if len(frames) == 1 else dt.rbind(*frames)
+        for name, field_type, _ in columns or []:
+            if field_type == 'DATE':
+                data[name] = data[:, dt.as_type(f[name], dt.Type.date32)]
+        return data
+
+    def _ref_key(self, values, id_attr, pattern, selected=None):
+        """Find the key to extract from the referenced entities of a column
+
+        The first key that matches the pattern is used. Otherwise, the id
+        attribute is used if it was selected and returned, or else the first
+        selected (or returned) key.
+
+        :param selected: nested attributes selected in `attributes`, e.g.,
+          `name` for `grp(name)`
+        :type selected: list
+
+        :returns: the key or None if there are no references to check yet
+        :rtype: str
+        """
+        if selected and id_attr not in selected:
+            id_attr = selected[0]
+        for value in values:
+            nested = value[0] if isinstance(value, list) and value else value
+            if isinstance(nested, dict) and nested:
+                keys = [key for key in nested if key != '_href']
+                if pattern is not None:
+                    match = pattern.search(','.join(keys))
+                    if match:
+                        return match.group()
+                if id_attr in nested or not keys:
+                    return id_attr
+                return keys[0]
+        return None
+
+    def _ref_value(self, value, key, multiple=False):
+        """Flatten a reference to the value of a key"""
+        if not value:
+            return None
+        if multiple:
+            values = [str(nested.get(key)) for nested in value if nested.get(key) is not None]
+            return ','.join(values) if values else None
+        return value.get(key)
+
+    def _dt_to_csv(self, datatable):
+        """Serialise a datatable object as CSV in memory
+
+        All values are quoted and missing values are written as empty strings.
+        Boolean columns are written as True/False rather than 1/0.
+
+        :param datatable: dataset to serialise
+        :type datatable: datatable
+
+        :returns: csv encoded as utf-8
+        :rtype: bytes
         """
-        data = datatable.to_pandas().replace({np.nan: None})
-        data.to_csv(path, index=False, quoting=csv.QUOTE_ALL)
+        data = datatable.copy()
+        for name, stype in zip(data.names, data.stypes):
+            if stype == dt.stype.bool8:
+                data[name] = data[:, dt.as_type(f[name], dt.Type.str32)]
+        return data.to_csv(quoting='all').encode('utf-8')
 
-    def import_dt(self, pkg_entity: str, data):
+    def import_dt(self, pkg_entity: str, data, compress: bool = False,
+                  diff: bool = False, key: str = None, reference=None):
         """Import datatable object as a CSV file
 
+        The dataset is serialised in memory and uploaded without writing it
+        to disk first. If `diff` is True, only new and changed rows are
+        imported and the import is skipped if nothing changed.
+
         :param pkg_entity: the identifier of a table in EMX format (package_entity)
         :type pkg_entity: str
 
         :param data: the dataset to import
         :type data: datatable
 
-        :param label: a description to print (e.g., table name)
-        :type label: str
+        :param compress: if True, the csv file is uploaded as a zip archive
+        :type compress: bool
+
+        :param diff: if True, rows are compared with `reference` (or the data
+          in the table) before importing
+        :type diff: bool
+
+        :param key: column that identifies a row (default: the id attribute)
+        :type key: str
+
+        :param reference: (optional) the current state of the table, e.g., the
+          dataset as it was retrieved. If None, the table is retrieved.
+        :type reference: datatable
+
+        :returns: response or None if there was nothing to import
+        :rtype: response
+        """
+        if diff:
+            if key is None:
+                key = self.get_entity_meta_data(pkg_entity)['idAttribute']
+            if reference is None:
+                reference = self.get_dt(pkg_entity)
+            data = self._changed_rows(data, reference, key)
+            if data.nrows == 0:
+                print2('No changes to import into', pkg_entity)
+                return None
+            print2('Importing', data.nrows, 'new or changed rows into', pkg_entity)
+
+        return self._import_payload(pkg_entity, self._dt_to_csv(data), compress)
+
+    def _row_hashes(self, data, key, names):
+        """Create a hash of each row of a dataset
+
+        Values are normalised so that the same value stored as a different type
+        (e.g., 1 and 1.0) has the same hash.
+
+        :returns: row hash by key
+        :rtype: dict
+        """
+        def normalise(value):
+            if isinstance(value, float) and value.is_integer():
+                return int(value)
+            if isinstance(value, bool):
+                return str(value)
+            return value
+
+        columns = [
+            data[name].to_list()[0] if name in data.names else [None] * data.nrows
+            for name in names
+        ]
+        return {
+            row_key: hashlib.sha256(
+                json.dumps([normalise(value) for value in values], default=str).encode('utf-8')
+            ).hexdigest()
+            for row_key, values in zip(data[key].to_list()[0], zip(*columns))
+        }
+
+    def _changed_rows(self, data, reference, key):
+        """Find rows that are new or different from the reference
+
+        :param data: the dataset to import
+        :type data: datatable
+
+        :param reference: the current state of the table
+        :type reference: datatable
+
+        :param key: column that identifies a row
+        :type key: str
+
+        :returns: new and changed rows
+        :rtype: datatable
+        """
+        names = list(data.names)
+        current = self._row_hashes(reference, key, names)
+        changed = [
+            current.get(row_key) != checksum
+            for row_key, checksum in self._row_hashes(data, key, names).items()
+        ]
+        if len(changed) != data.nrows:
+            return data
+        return data[dt.Frame(changed, stype=dt.stype.bool8), :]
+
+    def _import_payload(self, pkg_entity: str, payload: bytes, compress: bool = False):
+        """Upload a csv file using the import wizard
+
+        :param pkg_entity: the identifier of a table in EMX format (package_entity)
+        :type pkg_entity: str
+
+        :param payload: csv file encoded as utf-8
+        :type payload: bytes
+
+        :param compress: if True, the csv file is uploaded as a zip archive
+        :type compress: bool
 
         :returns: response
         :rtype: response
         """
-        with tempfile.TemporaryDirectory() as tmp_dir:
-            file_path = f"{tmp_dir}/{pkg_entity}.csv"
-            self._dt_to_csv(file_path, data)
-
-            with open(abspath(file_path), 'r') as file:
-                response = self._session.post(
-                    url=self.api_file_import,
-                    headers=self._headers.token_header,
-                    files={'file': file},
-                    params={
-                        'action': 'add_update_existing',
-                        'metadataAction': 'ignore'
-                    }
-                )
-
-                if (response.status_code // 100) != 2:
-                    print2('Failed to import data into', pkg_entity,
-                           '(', response.status_code, ')')
+        filename = f"{pkg_entity}.csv"
+        content_type = 'text/csv'
+
+        if compress:
+            buffer = io.BytesIO()
+            with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as archive:
+                archive.writestr(filename, payload)
+            filename = f"{pkg_entity}.zip"
+            content_type = 'application/zip'
+            payload = buffer.getvalue()
+
+        response = self._session.post(
+            url=self.api_file_import,
+            headers=self._headers.token_header,
+            files={'file': (filename, payload, content_type)},
+            params={
+                'action': 'add_update_existing',
+                'metadataAction': 'ignore'
+            }
+        )
+
+        if (response.status_code // 100) != 2:
+            print2('Failed to import data into', pkg_entity,
+                   '(', response.status_code, ')')
+        else:
+            print2('Imported data into', pkg_entity)
+
+        return response
+
+    def import_dt_chunked(self, pkg_entity: str, data, chunk_size: int = 10000,
+                          max_workers: int = 1, state_path: str = None,
+                          compress: bool = False):
+        """Import a datatable object in chunks
+
+        The dataset is split into chunks of at most `chunk_size` rows and each
+        chunk is imported using `add_update_existing`. If `state_path` is
+        defined, successfully imported chunks are recorded in that file. When
+        the import is run again, chunks that were imported and have not
+        changed are skipped, so a failed import resumes from the first chunk
+        that did not succeed.
+
+        :param pkg_entity: the identifier of a table in EMX format (package_entity)
+        :type pkg_entity: str
+
+        :param data: the dataset to import
+        :type data: datatable
+
+        :param chunk_size: maximum number of rows per chunk
+        :type chunk_size: int
+
+        :param max_workers: number of chunks to import at the same time. If 1,
+          chunks are imported in order and the import stops at the first
+          failed chunk.
+        :type max_workers: int
+
+        :param state_path: location of a json file to track imported chunks
+        :type state_path: str
+
+        :param compress: if True, chunks are uploaded as zip archives
+        :type compress: bool
+
+        :returns: the number of chunks and the index of imported, skipped,
+          and failed chunks
+        :rtype: dict
+        """
+        state = {'pkg_entity': pkg_entity, 'chunk_size': chunk_size, 'chunks': {}}
+        if state_path and exists(state_path):
+            with open(state_path, 'r', encoding='utf-8') as file:
+                saved = json.load(file)
+            if saved.get('pkg_entity') == pkg_entity and saved.get('chunk_size') == chunk_size:
+                state = saved
+
+        result = {'chunks': 0, 'imported': [], 'skipped': [], 'failed': []}
+        lock = threading.Lock()
+
+        def save_state():
+            if state_path:
+                with open(state_path, 'w', encoding='utf-8') as file:
+                    json.dump(state, file, indent=2)
+
+        def import_chunk(index, payload, checksum):
+            try:
+                response = self._import_payload(pkg_entity, payload, compress)
+            except requests.exceptions.RequestException as error:
+                print2('Failed to import chunk', index, 'into', pkg_entity, '(', error, ')')
+                with lock:
+                    result['failed'].append(index)
+                return False
+
+            with lock:
+                if (response.status_code // 100) == 2:
+                    state['chunks'][str(index)] = checksum
+                    result['imported'].append(index)
+                    save_state()
+                    return True
+                result['failed'].append(index)
+                return False
+
+        def get_chunks():
+            for index, start in enumerate(range(0, data.nrows, chunk_size)):
+                payload = self._dt_to_csv(data[start:start + chunk_size, :])
+                checksum = hashlib.sha256(payload).hexdigest()
+                if state['chunks'].get(str(index)) == checksum:
+                    result['skipped'].append(index)
                 else:
-                    print2('Imported data into', pkg_entity)
+                    yield index, payload, checksum
 
-                file.close()
-            return response
+        result['chunks'] = -(-data.nrows // chunk_size)
+        if max_workers > 1:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                futures = []
+                running = set()
+                for chunk in get_chunks():
+                    if len(running) >= max_workers:
+                        _, running = wait(running, return_when=FIRST_COMPLETED)
+                    future = executor.submit(import_chunk, *chunk)
+                    futures.append(future)
+                    running.add(future)
+                wait(running)
+
+            # raise errors other than failed requests (these are recorded as failed)
+            for future in futures:
+                future.result()
+        else:
+            for chunk in get_chunks():
+                if not import_chunk(*chunk):
+                    break
+
+        print2(
+            f"Imported {len(result['imported'])} of {result['chunks']} chunks into",
+            pkg_entity, f"({len(result['skipped'])} skipped, {len(result['failed'])} failed)"
+        )
+        return result
 
     def import_file(self, file):
         """Import a file into Molgenis
         Import a file (pdf, txt, docx, etc.) into the files table. Content type
-        and size is automatically determined.
+        and size is automatically determined. The file is streamed, so it is
+        not read into memory.
 
         @param file location and name of the file to import
 
@@ -89,40 +507,183 @@ class Molgenis(molgenis.Session):
 
         If the file was successfully imported, you will receive information about
         the file and the location in the database. Use the file identifier to set
-        additional permissions. This can be done using the molgenis commander.
-
-        ```zsh
-        mcmd config set host
-        mcmd give \ 
-        --user <user> <read|view|write|...> \
-        --entity <file-identifier-in-database> \
-        --package sys_FileMeta
-        ```
+        additional permissions (see `set_file_permissions`) or use `import_files`
+        to import and set the permissions of many files at once.
 
         @return a status message with import metadata
         """
-        with open(file, 'rb') as stream:
-            data = stream.read()
-            stream.close()
-
-        headers = self._headers.token_header
-        headers['x-molgenis-filename'] = file
-        headers['Content-Type'] = mimetypes.guess_type(file)[0]
+        headers = dict(self._headers.token_header)
+        headers['x-molgenis-filename'] = basename(file)
+        headers['Content-Type'] = mimetypes.guess_type(file)[0] or 'application/octet-stream'
         headers['Content-Size'] = str(getsize(file))
 
         url = f"{self._root_url}api/files"
-        response = self._session.post(
-            url=url,
-            headers=headers,
-            data=data
-        )
+        with open(file, 'rb') as stream:
+            response = self._session.post(url=url, headers=headers, data=stream)
 
         if response.status_code // 100 == 2:
-            result = json.loads(response.text)
-            print(response.status_code)
-            print(result)
-            return response
+            print2('Imported', file, '(', response.json().get('id'), ')')
         else:
-            print(f"Failed to import {file}")
-            print(response.status_code)
-            return response
+            print2('Failed to import', file, '(', response.status_code, ')')
+        return response
+
+    def _file_hash(self, file, chunk_size=1024 * 1024):
+        """Create a hash of the content of a file (read in chunks)
+
+        :rtype: str
+        """
+        checksum = hashlib.sha256()
+        with open(file, 'rb') as stream:
+            for chunk in iter(lambda: stream.read(chunk_size), b''):
+                checksum.update(chunk)
+        return checksum.hexdigest()
+
+    def set_file_permissions(self, ids, permissions):
+        """Give permissions on files in one request
+
+        Row level security must be enabled for `sys_FileMeta`.
+
+        :param ids: identifiers of the files
+        :type ids: list
+
+        :param permissions: permission by user, e.g., `{'anonymous': 'READ'}`
+        :type permissions: dict
+
+        :returns: response
+        :rtype: response
+        """
+        body = {
+            'objects': [
+                {
+                    'objectId': file_id,
+                    'permissions': [
+                        {'user': user, 'permission': permission}
+                        for user, permission in permissions.items()
+                    ]
+                }
+                for file_id in ids
+            ]
+        }
+        url = f"{self._api_url}permissions/entity-sys_FileMeta"
+        response = self._session.post(url=url, headers=self._headers.ct_token_header, json=body)
+
+        # permissions that exist already can only be updated
+        if (response.status_code // 100) != 2:
+            response = self._session.patch(
+                url=url, headers=self._headers.ct_token_header, json=body)
+
+        if (response.status_code // 100) != 2:
+            print2('Failed to set permissions on', len(ids), 'files (', response.status_code, ')')
+        else:
+            print2('Set permissions on', len(ids), 'files')
+        return response
+
+    def import_files(self, directory, pattern='*', manifest_path=None,
+                     max_workers=4, permissions=None):
+        """Import all files in a directory into the files table
+
+        Files are hashed and uploaded in chunks, so they are never read into
+        memory at once. Files with the same content are uploaded once. If
+        `manifest_path` is defined, the hash and identifier of each uploaded
+        file are stored. When files are imported again, files whose hash is in
+        the manifest are skipped if the identifier still exists on the server
+        (`sys_FileMeta`).
+
+        :param directory: location of the files
+        :type directory: str
+
+        :param pattern: glob pattern of the files to import (e.g., `*.jpg`)
+        :type pattern: str
+
+        :param manifest_path: location of the manifest (json)
+        :type manifest_path: str
+
+        :param max_workers: number of files to upload at the same time
+        :type max_workers: int
+
+        :param permissions: (optional) permission by user to give on the
+          uploaded files, e.g., `{'anonymous': 'READ'}` (see
+          `set_file_permissions`)
+        :type permissions: dict
+
+        :returns: file, hash, id, url, and status (imported, skipped, or
+          failed) of each file
+        :rtype: datatable
+        """
+        files = sorted(
+            file for file in glob(join(directory, pattern)) if isfile(file)
+        )
+
+        manifest = {}
+        if manifest_path and exists(manifest_path):
+            with open(manifest_path, 'r', encoding='utf-8') as file:
+                manifest = json.load(file)
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            hashes = list(executor.map(self._file_hash, files))
+
+        # check that files in the manifest still exist on the server
+        known = {entry['id'] for checksum, entry in manifest.items() if checksum in hashes}
+        if known:
+            existing = self.get(
+                'sys_FileMeta',
+                q=f"id=in=({','.join(sorted(known))})",
+                attributes='id,filename,url',
+                batch_size=10000
+            )
+            server = {row['id']: row for row in existing}
+            manifest = {
+                checksum: entry for checksum, entry in manifest.items()
+                if entry['id'] in server or checksum not in hashes
+            }
+
+        uploads = {}
+        for file, checksum in zip(files, hashes):
+            if checksum not in manifest:
+                uploads.setdefault(checksum, file)
+
+        def upload(checksum, file):
+            response = self.import_file(file)
+            if (response.status_code // 100) != 2:
+                return checksum, None
+            result = response.json()
+            return checksum, {
+                'id': result.get('id'),
+                'filename': result.get('filename', basename(file)),
+                'url': result.get('url'),
+            }
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results = list(executor.map(lambda item: upload(*item), uploads.items()))
+
+        uploaded = {checksum: entry for checksum, entry in results if entry}
+        manifest.update(uploaded)
+        if manifest_path:
+            with open(manifest_path, 'w', encoding='utf-8') as file:
+                json.dump(manifest, file, indent=2)
+
+        if permissions and uploaded:
+            self.set_file_permissions(
+                [entry['id'] for entry in uploaded.values()], permissions)
+
+        rows = {'file': [], 'hash': [], 'id': [], 'url': [], 'status': []}
+        for file, checksum in zip(files, hashes):
+            entry = manifest.get(checksum) or {}
+            if checksum in uploaded and uploads[checksum] == file:
+                status = 'imported'
+            elif entry:
+                status = 'skipped'
+            else:
+                status = 'failed'
+            rows['file'].append(file)
+            rows['hash'].append(checksum)
+            rows['id'].append(entry.get('id'))
+            rows['url'].append(entry.get('url'))
+            rows['status'].append(status)
+
+        print2(
+            f"Imported {rows['status'].count('imported')} of {len(files)} files from",
+            directory, f"({rows['status'].count('skipped')} skipped,",
+            f"{rows['status'].count('failed')} failed)"
+        )
+        return dt.Frame(rows, stypes={name: dt.stype.str32 for name in rows})
@@ -2,68 +2,317 @@
 FILE: ror.py
 AUTHOR: David Ruvolo
 CREATED: 2022-06-17
-MODIFIED: 2024-01-26
+MODIFIED: 2026-10-18
 PURPOSE: ROR REST API Client
 STATUS: stable
 PACKAGES: requests
 COMMENTS: https://ror.readme.io/docs/rest-api
 """
 
+from os import makedirs, path
+from concurrent.futures import ThreadPoolExecutor
 import urllib.parse
+import threading
+import sqlite3
+import json
+import time
 import requests
 
 
+def normalise_ror_id(code):
+    """Normalise a ROR identifier
+
+    :param code: a ROR ID as a full URL (`https://ror.org/<id>`), domain + ID
+      (`ror.org/<id>`), or only the ID
+    :type code: str
+
+    :returns: the ROR ID in lowercase
+    :rtype: str
+    """
+    return code.strip().rstrip('/').split('/')[-1].lower()
+
+
+def normalise_query(query):
+    """Normalise a search query (lowercase and single spaces)
+
+    :param query: a search query
+    :type query: str
+
+    :rtype: str
+    """
+    return ' '.join(str(query).lower().split())
+
+
+def normalise_organisation(record):
+    """Extract the name, location, and country of an organisation
+
+    :param record: an organisation returned by the ROR API
+    :type record: dict
+
+    :returns: id, code, name, latitude, longitude, city, country,
+      country_code, and established
+    :rtype: dict
+    """
+    address = (record.get('addresses') or [{}])[0]
+    country = record.get('country') or {}
+    return {
+        'id': record.get('id'),
+        'code': normalise_ror_id(record.get('id')),
+        'name': record.get('name'),
+        'latitude': address.get('lat'),
+        'longitude': address.get('lng'),
+        'city': address.get('city'),
+        'country': country.get('country_name'),
+        'country_code': country.get('country_code'),
+        'established': record.get('established'),
+    }
+
+
+class RateLimiter:
+    """Limit the number of requests per second (thread safe)"""
+
+    def __init__(self, rate=5):
+        """
+        :param rate: maximum number of requests per second
+        :type rate: float
+        """
+        self.interval = 1 / rate if rate else 0
+        self._next = 0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        """Wait until the next request is allowed"""
+        with self._lock:
+            now = time.monotonic()
+            start = max(self._next, now)
+            self._next = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+
+
+class RorCache:
+    """Persistent cache for ROR responses (SQLite)"""
+
+    def __init__(self, cache_path, ttl=30*24*60*60, max_entries=50000):
+        """
+        :param cache_path: location of the database file
+        :type cache_path: str
+
+        :param ttl: number of seconds an entry is valid (default: 30 days)
+        :type ttl: int
+
+        :param max_entries: maximum number of entries. When the limit is
+          reached, the least recently used entries are removed.
+        :type max_entries: int
+        """
+        if path.dirname(cache_path):
+            makedirs(path.dirname(cache_path), exist_ok=True)
+
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(cache_path, check_same_thread=False)
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS cache ('
+            'key TEXT PRIMARY KEY, value TEXT NOT NULL, '
+            'created REAL NOT NULL, accessed REAL NOT NULL)'
+        )
+        self._db.commit()
+
+    def get(self, key, expired=False):
+        """Get an entry from the cache
+
+        :param key: cache key
+        :type key: str
+
+        :param expired: if True, expired entries are returned
+        :type expired: bool
+
+        :returns: cached value or None
+        """
+        with self._lock:
+            row = self._db.execute(
+                'SELECT value, created FROM cache WHERE key = ?', (key,)
+            ).fetchone()
+            if row is None or (not expired and time.time() - row[1] > self.ttl):
+                return None
+            self._db.execute(
+                'UPDATE cache SET accessed = ? WHERE key = ?', (time.time(), key)
+            )
+            self._db.commit()
+        return json.loads(row[0])
+
+    def set(self, key, value):
+        """Add or replace an entry in the cache
+
+        :param key: cache key
+        :type key: str
+
+        :param value: a json serialisable value
+        """
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                'INSERT OR REPLACE INTO cache (key, value, created, accessed) '
+                'VALUES (?, ?, ?, ?)', (key, json.dumps(value), now, now)
+            )
+            self._db.execute(
+                'DELETE FROM cache WHERE key IN ('
+                'SELECT key FROM cache ORDER BY accessed DESC LIMIT -1 OFFSET ?)',
+                (self.max_entries,)
+            )
+            self._db.commit()
+
+    def clear(self):
+        """Remove all entries"""
+        with self._lock:
+            self._db.execute('DELETE FROM cache')
+            self._db.commit()
+
+    def close(self):
+        """Close the database connection"""
+        with self._lock:
+            self._db.close()
+
+
 class RorClient:
     """Interact with the ROR API"""
 
-    def __init__(self):
+    def __init__(self, cache_path=None, ttl=30*24*60*60, max_entries=50000,
+                 offline=False, rate_limit=5, index=None):
+        """
+        :param cache_path: if defined, responses are cached in a SQLite database
+          at this location
+        :type cache_path: str
+
+        :param ttl: number of seconds a cached response is valid
+        :type ttl: int
+
+        :param max_entries: maximum number of cached responses
+        :type max_entries: int
+
+        :param offline: if True, responses are only served from the cache
+          (including expired entries) and the API is never queried
+        :type offline: bool
+
+        :param rate_limit: maximum number of requests per second to the API.
+          The ROR API allows 2000 requests per 5 minutes.
+        :type rate_limit: float
+
+        :param index: if defined, searches and lookups are answered using this
+          local copy of the ROR data dump (see `erns.utils.ror_index.RorIndex`)
+          instead of the API
+        :type index: RorIndex
+        """
         self.session = requests.Session()
         self.api = 'https://api.ror.org'
+        self.offline = offline
+        self.index = index
+        self.limiter = RateLimiter(rate_limit)
+        self.cache = RorCache(cache_path, ttl, max_entries) if cache_path else None
+        if offline and not self.cache:
+            raise ValueError('Offline mode requires a cache (cache_path)')
 
-    def _get(self, url, **kwargs):
+    def _get(self, url, message=None, **kwargs):
         """Create a new GET request"""
+        self.limiter.wait()
         response = self.session.get(url, **kwargs)
-        response.raise_for_status()
-        if 'errors' in response:
-            raise print('Error in request', str(response['errors']))
-        return response.json()
+        self._validate_reponse(message, response)
+        data = response.json()
+        if 'errors' in data:
+            raise requests.exceptions.HTTPError(
+                f"{message}: {data['errors']}", response=response)
+        return data
 
-    def _validate_reponse(self, message: str = None, response: dict = None):
+    def _cached_get(self, key, url, message=None):
+        """GET request with caching
+
+        :param key: cache key
+        :type key: str
+
+        :param url: url to request if the key isn't cached
+        :type url: str
+
+        :returns: response json or None (offline and not cached)
+        :rtype: dict
+        """
+        if self.cache:
+            cached = self.cache.get(key, expired=self.offline)
+            if cached is not None:
+                return cached
+
+        if self.offline:
+            print('Not available offline:', key)
+            return None
+
+        data = self._get(url, message)
+        if self.cache:
+            self.cache.set(key, data)
+        return data
+
+    def _validate_reponse(self, message: str = None, response=None):
         """Validate response from the REST API
 
         :param message: an error message to display
         :type message: string
 
         :param response: a response object
-        :type response: dict
+        :type response: requests.Response
         """
-        if response.status_code / 100 != 2:
+        if response.status_code // 100 != 2:
             raise requests.exceptions.HTTPError(message, response=response)
 
     @property
     def ping(self):
         """Check the status of the REST API"""
         url = f"{self.api}/heartbeat"
-        response = self._get(url)
+        response = self.session.get(url)
         self._validate_reponse('ROR serverice is disrupted', response=response)
         print(f'ROR is online {response.status_code}')
 
-    def search_organizations(self, query):
+    def search_organizations(self, query, country=None):
         """Search for organizations
         :param query: a search query and or filters
         :type query: string
 
+        :param country: if defined, only organisations in this country (name or
+          ISO code) are returned. This is only supported by the local index.
+        :type country: string
+
         :return: a response containing one or more organisations
         :rtype: recordset
         """
+        if self.index is not None:
+            return self.index.search(query, country=country)
+
         q = urllib.parse.quote(query)
         url = f"{self.api}/organizations?query={q}"
-        response = self._get(url)
-        self._validate_reponse('Unable to retrieve organisations', response)
+        response = self._cached_get(
+            f"search:{normalise_query(query)}", url,
+            'Unable to retrieve organisations')
+        if response is None:
+            return []
 
         print('Found', response.get('number_of_results'), 'records')
         return response.get('items')
 
+    def search_organizations_advanced(self, query, page=1):
+        """Search for organizations using an advanced query
+
+        :param query: advanced query using ROR fields (e.g., `country.country_code:NL`)
+        :type query: string
+
+        :param page: page number (20 results per page)
+        :type page: int
+
+        :return: the full response containing `number_of_results` and `items`
+        :rtype: dict
+        """
+        url = f"{self.api}/organizations?query.advanced={query}&page={page}"
+        return self._cached_get(
+            f"advanced:{normalise_query(query)}:{page}", url,
+            'Unable to retrieve organisations')
+
     def get_organisation_by_id(self, code):
         """Get organisation by ROR ID
         Retrieve metadata about an organisation using a ROR ID. An ID may contain
@@ -75,7 +324,41 @@ class RorClient:
         :return: information about an organisation
         :rtype: dict
         """
-        url = f"{self.api}/organizations/{code}"
-        response = self._get(url)
-        self._validate_reponse('Unable to retrieve organisation', response)
-        return response
+        ror_id = normalise_ror_id(code)
+        if self.index is not None:
+            return self.index.get(ror_id)
+
+        url = f"{self.api}/organizations/{ror_id}"
+        return self._cached_get(
+            f"id:{ror_id}", url, 'Unable to retrieve organisation')
+
+    def get_organisations(self, codes, max_workers=8):
+        """Get organisations by ROR ID (bulk)
+        Retrieve metadata about many organisations at once. IDs are normalised
+        and deduplicated, and organisations are retrieved concurrently. Cached
+        organisations are not requested again.
+
+        :param codes: ROR identifiers (see `get_organisation_by_id`)
+        :type codes: list
+
+        :param max_workers: number of concurrent requests
+        :type max_workers: int
+
+        :return: normalised records (see `normalise_organisation`) by ROR ID;
+          the value is None if an organisation could not be retrieved
+        :rtype: dict
+        """
+        ror_ids = list(dict.fromkeys(
+            normalise_ror_id(code) for code in codes if code
+        ))
+
+        def get_organisation(ror_id):
+            try:
+                record = self.get_organisation_by_id(ror_id)
+            except requests.exceptions.RequestException as error:
+                print('Unable to retrieve organisation', ror_id, error)
+                return ror_id, None
+            return ror_id, normalise_organisation(record) if record else None
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return dict(executor.map(get_organisation, ror_ids))
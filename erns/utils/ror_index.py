@@ -0,0 +1,258 @@
+"""Local index of the ROR data dump
+FILE: ror_index.py
+AUTHOR: David Ruvolo
+CREATED: 2026-10-18
+MODIFIED: 2026-10-18
+PURPOSE: search ROR organisations offline
+STATUS: stable
+PACKAGES: NA
+COMMENTS: The data dump is available at https://doi.org/10.5281/zenodo.6347574.
+Use the v1 json file (or the zip archive) so that records have the same
+structure as the responses of the REST API.
+"""
+
+from collections import defaultdict
+import unicodedata
+import zipfile
+import pickle
+import json
+import math
+import re
+
+from erns.utils.ror import normalise_ror_id
+
+
+def normalise_text(value):
+    """Lowercase text and remove accents and punctuation
+
+    :param value: text to normalise
+    :type value: str
+
+    :rtype: str
+    """
+    value = unicodedata.normalize('NFKD', str(value))
+    value = ''.join(char for char in value if not unicodedata.combining(char))
+    return re.sub(r'[^a-z0-9]+', ' ', value.lower()).strip()
+
+
+def tokenise(value):
+    """Split text into normalised tokens
+
+    :param value: text to split
+    :type value: str
+
+    :rtype: list
+    """
+    return normalise_text(value).split()
+
+
+def trigrams(token):
+    """Create the character trigrams of a token (padded with spaces)
+
+    :param token: a normalised token
+    :type token: str
+
+    :rtype: set
+    """
+    padded = f" {token} "
+    return {padded[i:i+3] for i in range(len(padded) - 2)}
+
+
+def organisation_names(record):
+    """Get all names of an organisation (name, aliases, acronyms, labels)
+
+    :param record: an organisation in the ROR v1 format
+    :type record: dict
+
+    :rtype: list
+    """
+    names = [record.get('name')]
+    names += record.get('aliases') or []
+    names += record.get('acronyms') or []
+    names += [label.get('label') for label in record.get('labels') or []]
+    return [name for name in names if name]
+
+
+class RorIndex:
+    """Token and trigram index of ROR organisations"""
+
+    def __init__(self, records=None):
+        """
+        :param records: organisations in the ROR v1 format
+        :type records: list
+        """
+        self.records = []
+        self.ids = {}
+        self.countries = []
+        self.postings = defaultdict(set)
+        self.vocabulary = defaultdict(set)
+        self.trigram_counts = {}
+        for record in records or []:
+            self.add(record)
+
+    def __len__(self):
+        return len(self.records)
+
+    @classmethod
+    def from_dump(cls, dump_path):
+        """Create an index from the ROR data dump
+
+        :param dump_path: location of the data dump (zip archive or json file)
+        :type dump_path: str
+
+        :rtype: RorIndex
+        """
+        if dump_path.endswith('.zip'):
+            with zipfile.ZipFile(dump_path) as archive:
+                files = [
+                    name for name in archive.namelist()
+                    if name.endswith('.json') and 'schema_v2' not in name
+                ]
+                with archive.open(files[0]) as file:
+                    records = json.load(file)
+        else:
+            with open(dump_path, 'r', encoding='utf-8') as file:
+                records = json.load(file)
+        return cls(records)
+
+    @classmethod
+    def load(cls, index_path):
+        """Load an index that was saved using `save`
+
+        :param index_path: location of the index
+        :type index_path: str
+
+        :rtype: RorIndex
+        """
+        with open(index_path, 'rb') as file:
+            index = pickle.load(file)
+        if not isinstance(index, cls):
+            raise ValueError(f"{index_path} is not a ROR index; create it again using `save`")
+        return index
+
+    def save(self, index_path):
+        """Save the index so that the dump doesn't have to be parsed again
+
+        :param index_path: location of the index
+        :type index_path: str
+        """
+        with open(index_path, 'wb') as file:
+            pickle.dump(self, file, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def add(self, record):
+        """Add an organisation to the index
+
+        :param record: an organisation in the ROR v1 format
+        :type record: dict
+        """
+        position = len(self.records)
+        country = record.get('country') or {}
+        self.records.append(record)
+        self.ids[normalise_ror_id(record['id'])] = position
+        self.countries.append({
+            normalise_text(country.get('country_code') or ''),
+            normalise_text(country.get('country_name') or ''),
+        })
+        for name in organisation_names(record):
+            for token in tokenise(name):
+                if token not in self.postings:
+                    token_trigrams = trigrams(token)
+                    self.trigram_counts[token] = len(token_trigrams)
+                    for trigram in token_trigrams:
+                        self.vocabulary[trigram].add(token)
+                self.postings[token].add(position)
+
+    def get(self, code):
+        """Get an organisation by ROR ID
+
+        :param code: ROR identifier (see `normalise_ror_id`)
+        :type code: str
+
+        :returns: organisation or None
+        :rtype: dict
+        """
+        position = self.ids.get(normalise_ror_id(code))
+        return self.records[position] if position is not None else None
+
+    def _similar_tokens(self, token, threshold):
+        """Find tokens in the index that are similar to a token
+
+        :returns: similar tokens and their trigram (jaccard) similarity
+        :rtype: dict
+        """
+        if token in self.postings:
+            return {token: 1.0}
+
+        query_trigrams = trigrams(token)
+        shared = defaultdict(int)
+        for trigram in query_trigrams:
+            for candidate in self.vocabulary.get(trigram, ()):
+                shared[candidate] += 1
+
+        similar = {}
+        for candidate, count in shared.items():
+            union = len(query_trigrams) + self.trigram_counts[candidate] - count
+            similarity = count / union
+            if similarity >= threshold:
+                similar[candidate] = similarity
+        return similar
+
+    def search(self, query, country=None, limit=20, threshold=0.5):
+        """Search organisations by name
+
+        Each token in the query is matched to tokens in the names, aliases,
+        acronyms, and labels of the organisations (or similar tokens if there
+        isn't an exact match). Organisations are scored by the matched tokens
+        weighted by how rare the token is.
+
+        :param query: organisation name
+        :type query: str
+
+        :param country: if defined, only organisations in this country (name
+          or ISO code) are returned
+        :type country: str
+
+        :param limit: maximum number of organisations to return
+        :type limit: int
+
+        :param threshold: minimum trigram similarity for similar tokens
+        :type threshold: float
+
+        :returns: organisations in the same format as the REST API with the
+          score of the match (`score`)
+        :rtype: list
+        """
+        tokens = list(dict.fromkeys(tokenise(query)))
+        if not tokens:
+            return []
+
+        total = len(self.records)
+        country = normalise_text(country) if country else None
+
+        scores = defaultdict(float)
+        weights = 0
+        for token in tokens:
+            similar = self._similar_tokens(token, threshold)
+            weight = math.log(1 + total / (1 + len(self.postings.get(token, ()))))
+            weights += weight
+
+            best = {}
+            for candidate, similarity in similar.items():
+                for position in self.postings[candidate]:
+                    if similarity > best.get(position, 0):
+                        best[position] = similarity
+            for position, similarity in best.items():
+                scores[position] += weight * similarity
+
+        ranked = sorted(
+            (
+                (score / weights, position)
+                for position, score in scores.items()
+                if not country or country in self.countries[position]
+            ),
+            key=lambda item: (-item[0], item[1])
+        )
+        return [
+            dict(self.records[position], score=round(score, 4))
+            for score, position in ranked[:limit]
+        ]
@@ -0,0 +1,245 @@
+"""Match organisation names to ROR
+FILE: ror_matcher.py
+AUTHOR: David Ruvolo
+CREATED: 2026-10-18
+MODIFIED: 2026-10-18
+PURPOSE: find the ROR ID of many organisations at once
+STATUS: stable
+PACKAGES: datatable
+COMMENTS: Candidates are retrieved using `RorClient.search_organizations`
+(either the API or a local index) and scored by name similarity and the
+agreement of city and country.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from difflib import SequenceMatcher
+import threading
+from datatable import dt
+import requests
+
+from erns.utils.ror import normalise_organisation, normalise_query
+from erns.utils.ror_index import normalise_text, organisation_names
+
+# weight of each component of the confidence score. If the city or country of
+# a provider is unknown, the weight is distributed over the other components.
+SCORE_WEIGHTS = {'name': 0.7, 'city': 0.15, 'country': 0.15}
+
+
+def name_similarity(name, record):
+    """Compare a name to all names of an organisation
+
+    :param name: organisation name
+    :type name: str
+
+    :param record: an organisation in the ROR v1 format
+    :type record: dict
+
+    :returns: the highest similarity (0 to 1)
+    :rtype: float
+    """
+    name = normalise_text(name)
+    return max([
+        SequenceMatcher(None, name, normalise_text(value)).ratio()
+        for value in organisation_names(record)
+    ] + [0])
+
+
+def location_agreement(value, *options):
+    """Check if a value matches one of the options
+
+    Values that are not text (e.g., NaN in a pandas dataset) are unknown.
+
+    :returns: 1 if it matches, 0 if it doesn't, and None if unknown
+    :rtype: int
+    """
+    if not isinstance(value, str) or not value.strip():
+        return None
+    options = [
+        normalise_text(option) for option in options
+        if isinstance(option, str) and option.strip()
+    ]
+    if not options:
+        return None
+    return int(normalise_text(value) in options)
+
+
+class RorMatcher:
+    """Rank ROR organisations for a list of names"""
+
+    def __init__(self, client, candidates=5, threshold=0.85, margin=0.05):
+        """
+        :param client: ROR client (see `erns.utils.ror.RorClient`)
+        :type client: RorClient
+
+        :param candidates: number of candidates to score per name
+        :type candidates: int
+
+        :param threshold: minimum confidence of a match that doesn't need to be
+          reviewed
+        :type threshold: float
+
+        :param margin: minimum difference in confidence between the best and
+          the second best match that doesn't need to be reviewed
+        :type margin: float
+        """
+        self.client = client
+        self.candidates = candidates
+        self.threshold = threshold
+        self.margin = margin
+        self._cache = {}
+        self._lock = threading.Lock()
+
+    def get_candidates(self, name, country=None):
+        """Get candidate organisations for a name (cached)
+
+        :param name: organisation name
+        :type name: str
+
+        :param country: country of the organisation (only used by the local index)
+        :type country: str
+
+        :rtype: list
+        """
+        key = (normalise_query(name), country)
+        with self._lock:
+            if key in self._cache:
+                return self._cache[key]
+
+        try:
+            if self.client.index is not None:
+                records = self.client.search_organizations(name, country=country)
+            else:
+                records = self.client.search_organizations(name)
+        except requests.exceptions.RequestException as error:
+            print('Unable to retrieve candidates for', name, error)
+            return []
+
+        records = (records or [])[:self.candidates]
+        with self._lock:
+            self._cache[key] = records
+        return records
+
+    def score(self, name, record, city=None, country=None):
+        """Score a candidate organisation
+
+        :param name: organisation name
+        :type name: str
+
+        :param record: candidate organisation in the ROR v1 format
+        :type record: dict
+
+        :param city: city of the organisation
+        :type city: str
+
+        :param country: country (name or ISO code) of the organisation
+        :type country: str
+
+        :returns: normalised organisation (see `normalise_organisation`) with
+          the scores of each component and the overall confidence
+        :rtype: dict
+        """
+        organisation = normalise_organisation(record)
+        scores = {
+            'name': name_similarity(name, record),
+            'city': location_agreement(city, organisation['city']),
+            'country': location_agreement(
+                country, organisation['country'], organisation['country_code']),
+        }
+        known = {key: value for key, value in scores.items() if value is not None}
+        weights = sum(SCORE_WEIGHTS[key] for key in known)
+        confidence = sum(SCORE_WEIGHTS[key] * value for key, value in known.items())
+        organisation.update({
+            'nameScore': round(scores['name'], 4),
+            'cityMatch': scores['city'],
+            'countryMatch': scores['country'],
+            'confidence': round(confidence / weights, 4),
+        })
+        return organisation
+
+    def match_one(self, name, city=None, country=None):
+        """Rank the candidates for one organisation
+
+        :returns: scored candidates in order of confidence
+        :rtype: list
+        """
+        ranked = sorted(
+            (
+                self.score(name, record, city, country)
+                for record in self.get_candidates(name, country)
+            ),
+            key=lambda candidate: -candidate['confidence']
+        )
+        for rank, candidate in enumerate(ranked, start=1):
+            candidate['rank'] = rank
+        return ranked
+
+    def match(self, providers, name='projectName', city='city',
+              country='country', top=1, max_workers=4):
+        """Match a list of organisations to ROR
+
+        :param providers: organisations as a list of dictionaries or a datatable
+        :type providers: list | datatable
+
+        :param name: column containing the organisation name
+        :type name: str
+
+        :param city: column containing the city (optional)
+        :type city: str
+
+        :param country: column containing the country (optional)
+        :type country: str
+
+        :param top: number of candidates to return per organisation
+        :type top: int
+
+        :param max_workers: number of names to search at the same time
+        :type max_workers: int
+
+        :returns: a match table with one row per candidate ranked by confidence
+          (or one empty row if nothing was found). Rows where `needsReview`
+          is True should be checked manually.
+        :rtype: datatable
+        """
+        if isinstance(providers, dt.Frame):
+            columns = providers.to_dict()
+            providers = [
+                dict(zip(columns.keys(), values))
+                for values in zip(*columns.values())
+            ]
+
+        def match_provider(provider):
+            return self.match_one(
+                name=provider[name],
+                city=provider.get(city),
+                country=provider.get(country)
+            )
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results = list(executor.map(match_provider, providers))
+
+        rows = []
+        for provider, ranked in zip(providers, results):
+            best = ranked[0]['confidence'] if ranked else 0
+            second = ranked[1]['confidence'] if len(ranked) > 1 else 0
+            needs_review = (
+                best < self.threshold or best - second < self.margin
+            )
+            for candidate in ranked[:top] or [{}]:
+                rows.append({
+                    'projectName': provider[name],
+                    'rank': candidate.get('rank'),
+                    'code': candidate.get('code'),
+                    'iri': candidate.get('id'),
+                    'name': candidate.get('name'),
+                    'city': candidate.get('city'),
+                    'country': candidate.get('country'),
+                    'latitude': candidate.get('latitude'),
+                    'longitude': candidate.get('longitude'),
+                    'nameScore': candidate.get('nameScore'),
+                    'cityMatch': candidate.get('cityMatch'),
+                    'countryMatch': candidate.get('countryMatch'),
+                    'confidence': candidate.get('confidence', 0),
+                    'needsReview': needs_review,
+                })
+
+        return dt.Frame(rows)
@@ -0,0 +1,274 @@
+"""Table snapshots for incremental refreshes
+FILE: snapshot.py
+AUTHOR: David Ruvolo
+CREATED: 2026-10-18
+MODIFIED: 2026-10-18
+PURPOSE: keep a local copy of a table and update it using the changed rows
+STATUS: stable
+PACKAGES: datatable, molgenis-py-client
+COMMENTS: A snapshot stores the rows of a table with a hash of each row. When
+the table is retrieved again, only new and changed rows are processed. If a
+`categorise` function is defined, the categories of each row (e.g., age group,
+sex) are stored and the counts per category are updated using the changes.
+"""
+
+from os import makedirs, path
+import hashlib
+import json
+from datatable import dt
+
+
+def row_hash(row):
+    """Create a hash of a row
+
+    :param row: a row (json serialisable)
+    :type row: dict
+
+    :rtype: str
+    """
+    content = json.dumps(row, sort_keys=True, default=str)
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+
+class TableSnapshot:
+    """Local snapshot of a table"""
+
+    def __init__(self, snapshot_path=None, key='_href', categorise=None,
+                 reference=None):
+        """
+        :param snapshot_path: location of the snapshot (json). If None, the
+          snapshot is not saved
+        :type snapshot_path: str
+
+        :param key: column that identifies a row
+        :type key: str
+
+        :param categorise: a function that receives a list of rows and the
+          reference and returns a datatable object with one column per
+          category (dimension) and one row per row
+        :type categorise: function
+
+        :param reference: value that categories depend on (e.g., the date ages
+          are calculated at). The reference is stored in the snapshot; if it
+          differs from the stored reference, all rows are categorised again
+          when the snapshot is loaded (see `recategorised`).
+        :type reference: str
+        """
+        self.snapshot_path = snapshot_path
+        self.key = key
+        self.categorise = categorise
+        self.reference = reference
+        self.marker = None
+        self.recategorised = False
+        self.dimensions = []
+        self.counts = {}
+        self._rows = {}
+
+        if snapshot_path and path.exists(snapshot_path):
+            self._load()
+
+    def __len__(self):
+        return len(self._rows)
+
+    def __contains__(self, key):
+        return key in self._rows
+
+    def keys(self):
+        """Get the keys of all rows
+
+        :rtype: set
+        """
+        return set(self._rows)
+
+    def records(self):
+        """Get all rows
+
+        :rtype: list
+        """
+        return [entry['row'] for entry in self._rows.values()]
+
+    def _load(self):
+        """Load a saved snapshot"""
+        with open(self.snapshot_path, 'r', encoding='utf-8') as file:
+            saved = json.load(file)
+        if saved.get('key') != self.key:
+            return
+
+        self.marker = saved.get('marker')
+        self.dimensions = saved.get('dimensions', [])
+        self._rows = saved.get('rows', {})
+        self.counts = {dimension: {} for dimension in self.dimensions}
+        for dimension, category, count in saved.get('counts', []):
+            self.counts[dimension][category] = count
+
+        if self.categorise and saved.get('reference') != self.reference:
+            self.recategorise()
+            self.recategorised = True
+
+    def save(self):
+        """Save the snapshot"""
+        if not self.snapshot_path:
+            return
+        if path.dirname(self.snapshot_path):
+            makedirs(path.dirname(self.snapshot_path), exist_ok=True)
+        with open(self.snapshot_path, 'w', encoding='utf-8') as file:
+            json.dump({
+                'key': self.key,
+                'reference': self.reference,
+                'marker': self.marker,
+                'dimensions': self.dimensions,
+                'counts': [
+                    [dimension, category, count]
+                    for dimension, counts in self.counts.items()
+                    for category, count in counts.items()
+                ],
+                'rows': self._rows,
+            }, file)
+
+    def _categories(self, rows):
+        """Categorise rows
+
+        :returns: categories of each row (in the order of `dimensions`)
+        :rtype: list
+        """
+        if not self.categorise or not rows:
+            return [None] * len(rows)
+        categories = self.categorise(rows, self.reference)
+        self.dimensions = list(categories.names)
+        for dimension in self.dimensions:
+            self.counts.setdefault(dimension, {})
+        return [list(values) for values in zip(*categories.to_list())]
+
+    def _count(self, categories, change):
+        """Update the counts of the categories of a row"""
+        if categories is None:
+            return
+        for dimension, category in zip(self.dimensions, categories):
+            counts = self.counts[dimension]
+            counts[category] = counts.get(category, 0) + change
+            if counts[category] == 0:
+                del counts[category]
+
+    def recategorise(self):
+        """Categorise all rows again and recalculate the counts"""
+        keys = list(self._rows)
+        categories = self._categories([self._rows[key]['row'] for key in keys])
+        self.counts = {dimension: {} for dimension in self.dimensions}
+        for key, values in zip(keys, categories):
+            self._rows[key]['categories'] = values
+            self._count(values, 1)
+
+    def apply(self, rows, deleted=None):
+        """Apply changes to the snapshot
+
+        :param rows: new and changed rows (other rows are ignored)
+        :type rows: list
+
+        :param deleted: keys of rows that were deleted
+        :type deleted: list
+
+        :returns: number of inserted, updated, deleted, and unchanged rows
+        :rtype: dict
+        """
+        result = {'inserted': 0, 'updated': 0, 'deleted': 0, 'unchanged': 0}
+
+        changed = []
+        for row in rows:
+            key = row[self.key]
+            checksum = row_hash(row)
+            entry = self._rows.get(key)
+            if entry and entry['hash'] == checksum:
+                result['unchanged'] += 1
+                continue
+            result['updated' if entry else 'inserted'] += 1
+            changed.append((key, checksum, json.loads(json.dumps(row, default=str))))
+
+        categories = self._categories([row for _, _, row in changed])
+        for (key, checksum, row), values in zip(changed, categories):
+            if key in self._rows:
+                self._count(self._rows[key]['categories'], -1)
+            self._rows[key] = {'hash': checksum, 'row': row, 'categories': values}
+            self._count(values, 1)
+
+        for key in deleted or []:
+            entry = self._rows.pop(key, None)
+            if entry:
+                result['deleted'] += 1
+                self._count(entry['categories'], -1)
+
+        return result
+
+    def count_frame(self, dimension):
+        """Get the counts of a dimension as a datatable object
+
+        :param dimension: name of the dimension
+        :type dimension: str
+
+        :returns: a dataset with the columns `<dimension>` and `count`
+        :rtype: datatable
+        """
+        counts = self.counts.get(dimension, {})
+        return dt.Frame({
+            dimension: list(counts.keys()),
+            'count': list(counts.values())
+        })
+
+
+def fetch_changes(session, entity, snapshot, attributes=None, modified=None,
+                  batch_size=10000):
+    """Retrieve the rows of a table that changed since the last snapshot
+
+    If `modified` is defined and the snapshot has a marker (the highest value
+    of `modified` in the previous run), only rows that were modified since are
+    retrieved and deleted rows are detected by retrieving the keys only.
+    Otherwise, all rows are retrieved and unchanged rows are skipped by
+    `TableSnapshot.apply`.
+
+    :param session: a molgenis session
+    :type session: molgenis.Session
+
+    :param entity: the identifier of a table in EMX format (package_entity)
+    :type entity: str
+
+    :param snapshot: snapshot of the table
+    :type snapshot: TableSnapshot
+
+    :param attributes: comma separated list of attributes to retrieve
+    :type attributes: str
+
+    :param modified: (optional) attribute containing the date and time a row
+      was last modified
+    :type modified: str
+
+    :param batch_size: number of rows to retrieve per request
+    :type batch_size: int
+
+    :returns: new and changed rows, and the keys of deleted rows
+    :rtype: tuple(list, list)
+    """
+    if modified and attributes and modified not in attributes.split(','):
+        attributes = f"{attributes},{modified}"
+
+    if modified and snapshot.marker and len(snapshot):
+        rows = session.get(
+            entity,
+            q=f'{modified}=ge="{snapshot.marker}"',
+            attributes=attributes,
+            batch_size=batch_size
+        )
+        id_attribute = session.get_entity_meta_data(entity)['idAttribute']
+        keys = {
+            row[snapshot.key]
+            for row in session.get(entity, attributes=id_attribute, batch_size=10000)
+        }
+    else:
+        rows = session.get(entity, attributes=attributes, batch_size=batch_size)
+        keys = {row[snapshot.key] for row in rows}
+
+    if modified:
+        markers = [row[modified] for row in rows if row.get(modified)]
+        if markers:
+            snapshot.marker = max(markers + [snapshot.marker or ''])
+
+    deleted = [key for key in snapshot.keys() if key not in keys]
+    return rows, deleted
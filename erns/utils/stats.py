@@ -0,0 +1,126 @@
+"""Stats table for the ERN dashboards
+FILE: stats.py
+AUTHOR: David Ruvolo
+CREATED: 2026-10-18
+MODIFIED: 2026-10-18
+PURPOSE: update the values of the stats table (e.g., `ernstats_stats`)
+STATUS: stable
+PACKAGES: datatable
+COMMENTS: Rows are indexed once by `id` and by `component` and `label`. Each
+batch of updates is validated before any value is changed.
+"""
+
+from datatable import dt
+
+
+class StatsTable:
+    """Keyed updates of a stats table (id, component, label, value)"""
+
+    def __init__(self, data):
+        """
+        :param data: stats dataset containing the columns id, component,
+          label, and value
+        :type data: datatable
+        """
+        self._frame = data.copy()
+        self._values = self._frame['value'].to_list()[0]
+        self._stype = self._frame['value'].stype
+        self._index = {'id': {}, 'label': {}, 'component': {}}
+
+        columns = self._frame[:, ['id', 'component', 'label']].to_list()
+        for row, (_id, component, label) in enumerate(zip(*columns)):
+            self._index['id'].setdefault(_id, []).append(row)
+            self._index['label'].setdefault(label, []).append(row)
+            self._index['component'].setdefault((component, label), []).append(row)
+
+    @property
+    def frame(self):
+        """The stats dataset with all updates applied
+
+        :rtype: datatable
+        """
+        if self._stype == dt.str32:
+            values = [str(value) if value is not None else None for value in self._values]
+            self._frame['value'] = dt.Frame(values, stype=dt.str32)
+        else:
+            self._frame['value'] = dt.Frame(self._values)
+        return self._frame
+
+    def labels(self, component):
+        """Get the labels of a component in the order of the dataset
+
+        :param component: name of the component
+        :type component: str
+
+        :rtype: list
+        """
+        return [
+            label for (name, label) in self._index['component']
+            if name == component
+        ]
+
+    def _rows(self, key, by, component):
+        """Find the rows of a key"""
+        if by == 'id':
+            return self._index['id'].get(key)
+        if component is not None:
+            return self._index['component'].get((component, key))
+        return self._index['label'].get(key)
+
+    def update(self, values, by='id', component=None, strict=True):
+        """Update values
+
+        :param values: new values by key (id or label)
+        :type values: dict
+
+        :param by: type of key: `id` or `label`
+        :type by: str
+
+        :param component: if defined, labels are matched within this component
+          only; otherwise all rows with the label are updated
+        :type component: str
+
+        :param strict: if True, a KeyError is raised if one or more keys do not
+          exist and nothing is updated. Otherwise, unknown keys are ignored.
+        :type strict: bool
+
+        :returns: number of rows updated
+        :rtype: int
+        """
+        if by not in ('id', 'label'):
+            raise ValueError(f"Invalid key type '{by}'; use 'id' or 'label'")
+
+        rows = {key: self._rows(key, by, component) for key in values}
+        unknown = [key for key, matches in rows.items() if not matches]
+        if unknown:
+            message = f"Unknown {by} in {component or 'stats'}: {unknown}"
+            if strict:
+                raise KeyError(message)
+            print('Warning:', message)
+
+        updated = 0
+        for key, matches in rows.items():
+            for row in matches or []:
+                self._values[row] = values[key]
+                updated += 1
+        return updated
+
+    def update_from(self, data, key, value, by='id', component=None, strict=True):
+        """Update values using two columns of a dataset
+
+        :param data: dataset containing the keys and the new values
+        :type data: datatable
+
+        :param key: column containing the keys
+        :type key: str
+
+        :param value: column containing the new values
+        :type value: str
+
+        :returns: number of rows updated (see `update`)
+        :rtype: int
+        """
+        keys, values = data[:, [key, value]].to_list()
+        return self.update(
+            dict(zip(keys, values)), by=by, component=component, strict=strict
+        )
@@ -2,7 +2,7 @@
 # FILE: utils.py
 # AUTHOR: David Ruvolo
 # CREATED: 2023-06-13
-# MODIFIED: 2023-06-13
+# MODIFIED: 2026-10-18
 # PURPOSE: misc utils
 # STATUS: stable / ongoing
 # PACKAGES: **see below**
@@ -10,12 +10,90 @@
 # ///////////////////////////////////////////////////////////////////////////////
 
 import re
-import copy
 from datetime import datetime
 import pytz
 
 
-def flatten_data(data: list = None, col_patterns: str = None):
+def _flatten_value(column, value, pattern, targets, resolved, warned):
+    """Flatten a nested value
+
+    The key to extract is the first match of `pattern` in the comma separated
+    keys of the nested object. Matches are cached by column and keys so that
+    the pattern is evaluated once per column (unless the keys vary by row).
+    """
+    if isinstance(value, dict):
+        if bool(value):
+            key = targets.get(column) or _resolve_key(
+                column, value, pattern, resolved)
+            if key is not None and key in value:
+                value = value[key]
+            elif ('dict', column) not in warned:
+                warned.add(('dict', column))
+                print(f'Variable {column} is type "dict", but no target column found')
+        else:
+            value = None
+
+    if isinstance(value, list):
+        if bool(value):
+            values = []
+            for nested in value:
+                key = targets.get(column) or _resolve_key(
+                    column, nested, pattern, resolved)
+                if key is not None and key in nested:
+                    values.append(nested[key])
+                elif ('list', column) not in warned:
+                    warned.add(('list', column))
+                    print(f'Variable {column} is type "list", but no target column found')
+            if bool(values):
+                value = ','.join(map(str, values))
+        else:
+            value = None
+    return value
+
+
+def _resolve_key(column, value, pattern, resolved):
+    """Find (and cache) the key to extract from a nested object"""
+    keys = (column, tuple(value.keys()))
+    if keys not in resolved:
+        match = pattern.search(','.join(keys[1]))
+        resolved[keys] = match.group() if match else None
+    return resolved[keys]
+
+
+def flatten_rows(data: list = None, col_patterns: str = None, targets: dict = None):
+    """Flatten dataset by column (generator)
+
+    Rows are flattened one at a time into new dictionaries; the original
+    recordset is not modified. Nested lists are joined into a comma separated
+    string.
+
+    :param data: recordset containing nested data (objects and arrays)
+    :type data: recordset (i.e.,list of dictionaries)
+
+    :param col_patterns: names of the nested keys that contain the data to extract
+      that are formatted as a re search pattern (key1|key2|keyN)
+    :type col_patterns: str
+
+    :param targets: (optional) the key to extract by column (e.g., from the
+      table metadata). Other columns are resolved using `col_patterns`.
+    :type targets: dict
+
+    :returns: rows without nested data
+    :rtype: generator
+    """
+    pattern = re.compile(col_patterns) if col_patterns else re.compile(r'(?!)')
+    targets = targets or {}
+    resolved = {}
+    warned = set()
+    for row in data:
+        yield {
+            column: _flatten_value(column, value, pattern, targets, resolved, warned)
+            for column, value in row.items()
+            if column != '_href'
+        }
+
+
+def flatten_data(data: list = None, col_patterns: str = None, targets: dict = None):
     """Flatten dataset by column
 
     :param data: recordset containing nested data (objects and arrays)
@@ -24,41 +102,43 @@ def flatten_data(data: list = None, col_patterns: str = None):
     :param col_patterns: names of the nested keys that contain the data to extract
       that are formatted as a re search pattern (key1|key2|keyN)
 
+    :param targets: (optional) the key to extract by column (see `flatten_rows`)
+    :type targets: dict
+
     :returns: recordset without nested data
     :rtype: recordset
     """
-    new_data = copy.deepcopy(data)
-    for row in new_data:
-        if '_href' in row:
-            del row['_href']
-        for column in row.keys():
-            if isinstance(row[column], dict):
-                if bool(row[column]):
-                    col_match_dict = re.search(
-                        col_patterns, ','.join(row[column].keys()))
-                    if bool(col_match_dict):
-                        row[column] = row[column][col_match_dict.group()]
-                    else:
-                        print(
-                            f'Variable {column} is type "dict", but no target column found')
-                else:
-                    row[column] = None
-            if isinstance(row[column], list):
-                if bool(row[column]):
-                    values = []
-                    for nestedrow in row[column]:
-                        col_match_list = re.search(
-                            col_patterns, ','.join(nestedrow.keys()))
-                        if bool(col_match_list):
-                            values.append(nestedrow[col_match_list.group()])
-                        else:
-                            print(
-                                f'Variable {column} is type "list", but no target column found')
-                    if bool(values):
-                        row[column] = ','.join(values)
-                else:
-                    row[column] = None
-    return new_data
+    return list(flatten_rows(data, col_patterns, targets))
+
+
+def flatten_columns(data: list = None, col_patterns: str = None, targets: dict = None):
+    """Flatten dataset into columns
+
+    Same as `flatten_data`, but the result is collected by column so that it
+    can be passed to `dt.Frame` without creating a list of rows.
+
+    :param data: recordset containing nested data (objects and arrays)
+    :type data: recordset (i.e.,list of dictionaries)
+
+    :param col_patterns: names of the nested keys that contain the data to extract
+      that are formatted as a re search pattern (key1|key2|keyN)
+
+    :param targets: (optional) the key to extract by column (see `flatten_rows`)
+    :type targets: dict
+
+    :returns: values by column; missing values are None
+    :rtype: dict
+    """
+    columns = {}
+    for index, row in enumerate(flatten_rows(data, col_patterns, targets)):
+        for column, value in row.items():
+            if column not in columns:
+                columns[column] = [None] * index
+            columns[column].append(value)
+        for column, values in columns.items():
+            if len(values) == index:
+                values.append(None)
+    return columns
 
 
 def print2(*args):
@@ -0,0 +1,35 @@
+"""Tests for erns/utils/molgenis2.py"""
+
+from datatable import dt
+from erns.utils.molgenis2 import Molgenis
+
+META = {
+    'attributes': [
+        {'name': 'id', 'fieldType': 'STRING'},
+        {'name': 'count', 'fieldType': 'INT'},
+        {'name': 'date', 'fieldType': 'DATE'},
+        {'name': 'grp', 'fieldType': 'XREF', 'refEntity': {'idAttribute': 'id'}},
+    ]
+}
+
+
+def session(items):
+    """Create a client that returns one page of rows"""
+    client = Molgenis('http://localhost/api/')
+    client.get_entity_meta_data = lambda entity: {'idAttribute': 'id'}
+    client._get_batch = lambda **kwargs: {'meta': META, 'items': items}
+    return client
+
+
+def test_get_dt_empty_entity():
+    data = session([]).get_dt('pkg_entity')
+    assert data.nrows == 0
+    assert data.names == ('id', 'count', 'date', 'grp')
+    assert data['date'].stype == dt.stype.date32
+
+
+def test_get_dt_nested_selection():
+    items = [{'id': 'a', 'grp': {'name': 'group a'}}, {'id': 'b', 'grp': None}]
+    data = session(items).get_dt('pkg_entity', attributes='id,grp(name)')
+    assert data.names == ('id', 'grp')
+    assert data['grp'].to_list()[0] == ['group a', None]